@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from db import Database
+from replay import FixtureServer, synthetic_bounties
+from scraper import BountyScraper
+
+DEFAULT_SIZES = [15, 100, 1000]
+
+# Import time budget (ms) of each entry point, and what it must not import up front
+STARTUP_BUDGET_MS = {'cli': 50, 'scraper': 150}
+HEAVY_MODULES = {'playwright', 'asyncpg', 'aiohttp'}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """Cumulative import time (ms) of `module` and everything it imports, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times = {}
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def bench_startup(repeat: int = 5) -> Dict:
+    """Median import time of every entry point against its budget"""
+    results = {}
+    for module, budget_ms in STARTUP_BUDGET_MS.items():
+        runs = [import_times(module) for _ in range(repeat)]
+        import_ms = statistics.median(run[module] for run in runs)
+        heavy = sorted({name.split('.')[0] for run in runs for name in run} & HEAVY_MODULES)
+        results[module] = {
+            'import_ms': round(import_ms, 2),
+            'budget_ms': budget_ms,
+            'heavy_imports': heavy,
+            'ok': import_ms <= budget_ms and not heavy,
+        }
+        print(f"⏱️ import {module}: {import_ms:.1f} ms (budget {budget_ms} ms)"
+              + (f", imports {', '.join(heavy)}" if heavy else ""))
+    return results
+
+
+async def bench_scrape(cards: int, mode: str, db: Optional[Database], lean: bool = False) -> Dict:
+    """Scrape a fixture page of `cards` bounties and time every pipeline phase (ms)"""
+    items = synthetic_bounties(cards)
+    with FixtureServer(items, client_rendered=(mode == 'api'), embed_data=(mode == 'http')) as server:
+        scraper = BountyScraper("bench", "bench", use_api=(mode == 'api'), bounties_url=server.url, lean=lean,
+                                http=(mode == 'http'))
+
+        if mode == 'http':
+            try:
+                bounties = await scraper.scrape_http(limit=None) or []
+            finally:
+                await scraper.close_http()
+            phases = dict(scraper.sources[0].timings)
+        else:
+            started = time.perf_counter()
+            await scraper.start_browser()
+            launch_ms = (time.perf_counter() - started) * 1000
+            try:
+                bounties = await scraper.scrape_bounties(limit=None)
+            finally:
+                await scraper.close_browser()
+            phases = {'launch': launch_ms, **scraper.sources[0].timings}
+
+        # Half of the page is already known, like a poll after a burst
+        previous = bounties[len(bounties) // 2:]
+        with scraper.timed('dedup'):
+            new_bounties = scraper.find_new_bounties(bounties, previous)
+        phases['dedup'] = scraper.timings['dedup']
+
+        if db is not None:
+            with scraper.timed('db_dedup'):
+                await db.get_new_ids([bounty.id for bounty in bounties])
+            with scraper.timed('db_write'):
+                await db.save_bounties(bounties)
+            phases['db_dedup'] = scraper.timings['db_dedup']
+            phases['db_write'] = scraper.timings['db_write']
+
+    return {
+        'cards': cards,
+        'mode': mode,
+        'lean': lean,
+        'page_bytes': scraper.page_stats['bytes'],
+        'requests_blocked': sum(scraper.page_stats['blocked'].values()),
+        'extracted': len(bounties),
+        'new': len(new_bounties),
+        'ok': len(bounties) == cards,
+        'phases_ms': {phase: round(ms, 2) for phase, ms in phases.items()},
+    }
+
+
+async def run_benchmark(sizes: List[int], modes: List[str], repeat: int = 1, lean: bool = False) -> Dict:
+    # Never write benchmark rows into the real bounties table
+    database_url = os.getenv('BENCH_DATABASE_URL')
+    db = Database(database_url) if database_url else None
+    if db is None:
+        print("ℹ️ BENCH_DATABASE_URL not set, skipping database phases")
+
+    results = []
+    try:
+        for cards in sizes:
+            for mode in modes:
+                for run in range(repeat):
+                    print(f"⏱️ {cards} cards, {mode} extraction (run {run + 1}/{repeat})")
+                    result = await bench_scrape(cards, mode, db, lean)
+                    print(f"   {result['phases_ms']}")
+                    results.append(result)
+    finally:
+        if db is not None:
+            await db.close()
+
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape pipeline against offline fixtures")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="number of cards per fixture page (default: 15 100 1000)")
+    parser.add_argument('--modes', nargs='+', choices=['dom', 'api', 'http'], default=['dom', 'api', 'http'],
+                        help="extraction paths to benchmark (default: all)")
+    parser.add_argument('--lean', action='store_true', help="load the fixture pages in lean mode")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size and mode")
+    parser.add_argument('--output', default='bench_report.json', help="where to write the JSON report")
+    parser.add_argument('--startup', action='store_true',
+                        help="only measure the entry points' import time against STARTUP_BUDGET_MS")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup = bench_startup(max(args.repeat, 5))
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'commit': git_commit(), 'created_at': datetime.now().isoformat(),
+                       'python': platform.python_version(), 'startup': startup}, f, indent=2)
+        print(f"📄 Wrote startup report to {args.output}")
+        if not all(result['ok'] for result in startup.values()):
+            print("❌ Startup over budget")
+            raise SystemExit(1)
+        return
+
+    report = asyncio.run(run_benchmark(args.sizes, args.modes, args.repeat, args.lean))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Wrote benchmark report to {args.output}")
+
+    failed = [r for r in report['results'] if not r['ok']]
+    if failed:
+        print(f"❌ {len(failed)} run(s) extracted the wrong number of bounties")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Union
+from urllib.parse import urlsplit, urlunsplit
+
+BASE_URL = "https://replit.com"
+
+# Replit pays bounties in cycles, 100 cycles = $1, so one cycle is worth one cent
+CYCLES_PER_DOLLAR = 100
+CENTS_PER_CYCLE = 100 // CYCLES_PER_DOLLAR
+
+PRICE_RE = re.compile(r'\$\s*(\d[\d,]*(?:\.\d+)?)')
+
+
+def parse_cycles(cycles: Union[str, int, None]) -> Optional[int]:
+    """Cycles as a number, from an int or a "7,500" string (None if unknown)"""
+    if isinstance(cycles, int):
+        return cycles or None
+    digits = (cycles or '').replace(',', '').strip()
+    if not digits.isdigit():
+        return None
+    return int(digits) or None
+
+
+def parse_price_cents(price: Optional[str], cycles: Union[str, int, None] = None) -> Optional[int]:
+    """Bounty value in cents, from a "$1,234.50" price or else from its cycles"""
+    match = PRICE_RE.search(price or '')
+    if match:
+        return round(float(match.group(1).replace(',', '')) * 100)
+    cycle_count = parse_cycles(cycles)
+    return cycle_count * CENTS_PER_CYCLE if cycle_count else None
+
+
+def format_price(cents: Optional[int]) -> str:
+    """Display price, "$75" or "$12.50" """
+    if cents is None:
+        return "Price not found"
+    if cents % 100 == 0:
+        return f"${cents // 100:,}"
+    return f"${cents / 100:,.2f}"
+
+
+def parse_deadline(deadline: Union[str, datetime, None]) -> Optional[datetime]:
+    """Deadline from an ISO 8601 string (as the API sends it)"""
+    if deadline is None or isinstance(deadline, datetime):
+        return deadline
+    try:
+        return datetime.fromisoformat(deadline)
+    except ValueError:
+        return None
+
+
+def canonical_link(link: Optional[str]) -> Optional[str]:
+    """Absolute bounty URL without query string, fragment or trailing slash"""
+    if not link:
+        return None
+    if not link.startswith('http'):
+        link = BASE_URL + ('' if link.startswith('/') else '/') + link
+    parts = urlsplit(link)
+    return urlunsplit(('https', parts.netloc.lower(), parts.path.rstrip('/') or '/', '', ''))
+
+
+@dataclass(slots=True)
+class Bounty:
+    """One bounty, with its numbers and dates parsed once when it is extracted"""
+    id: str
+    title: str
+    description: str
+    author: str
+    link: Optional[str]
+    price_cents: Optional[int] = None
+    cycles: Optional[int] = None
+    time_info: str = ""
+    status: str = "Unknown status"
+    deadline: Optional[datetime] = None
+    scraped_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def price(self) -> str:
+        return format_price(self.price_cents)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'author': self.author,
+            'link': self.link,
+            'price_cents': self.price_cents,
+            'cycles': self.cycles,
+            'time_info': self.time_info,
+            'status': self.status,
+            'deadline': self.deadline.isoformat() if self.deadline else None,
+            'scraped_at': self.scraped_at.isoformat(),
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> 'Bounty':
+        fields = json.loads(data)
+        fields['deadline'] = parse_deadline(fields['deadline'])
+        fields['scraped_at'] = datetime.fromisoformat(fields['scraped_at'])
+        return cls(**fields)
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Bounty':
+        """Build a bounty from a row of the bounties table"""
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            description=row['description'] or "",
+            author=row['author'] or "",
+            link=row['link'],
+            price_cents=row['price_cents'],
+            cycles=row['cycles'],
+            time_info=row['time_info'] or "",
+            status=row['status'] or "",
+            deadline=row['deadline'],
+            scraped_at=row['scraped_at'],
+        )
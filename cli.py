@@ -0,0 +1,124 @@
+import argparse
+from typing import Callable, Dict, List, Optional
+
+# Only argparse is imported up front: every command imports what it needs
+# (Playwright, asyncpg, aiohttp, ...) when it runs, so short commands start fast.
+
+
+def scrape(argv: List[str]):
+    import asyncio
+    from scraper import main
+    asyncio.run(main(argv, prog="cli.py scrape", daemon=False))
+
+
+def daemon(argv: List[str]):
+    import asyncio
+    from scraper import main
+    asyncio.run(main(argv, prog="cli.py daemon", daemon=True))
+
+
+def notify_test(argv: List[str]):
+    import asyncio
+    import os
+    parser = argparse.ArgumentParser(prog="cli.py notify-test",
+                                     description="Send a test notification through the configured channels")
+    parser.add_argument('--chat-id', default=os.getenv('TELEGRAM_CHAT_ID'),
+                        help="Telegram chat to notify (default: TELEGRAM_CHAT_ID)")
+    parser.add_argument('--email', action='store_true', help="also send a test email to RECIPIENT_EMAIL")
+    args = parser.parse_args(argv)
+    asyncio.run(_notify_test(args.chat_id, args.email))
+
+
+async def _notify_test(chat_id: Optional[str], email: bool) -> bool:
+    import os
+    from notifier import TelegramNotifier
+
+    ok = True
+    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    if not bot_token or not chat_id:
+        print("❌ Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID to send a test message")
+        ok = False
+    else:
+        notifier = TelegramNotifier(bot_token)
+        try:
+            sent = await notifier.send_message(chat_id, "🧪 Test notification from the bounty scraper")
+        finally:
+            await notifier.close()
+        print(f"📢 Sent test message to chat {chat_id}" if sent else f"❌ Could not send to chat {chat_id}")
+        ok = ok and sent
+
+    if email:
+        from email_sender import send_test_email
+        ok = await send_test_email() and ok
+    return ok
+
+
+def db_stats(argv: List[str]):
+    import asyncio
+    argparse.ArgumentParser(prog="cli.py db-stats", description="Show what the database holds").parse_args(argv)
+    asyncio.run(_db_stats())
+
+
+async def _db_stats():
+    from db import Database
+
+    db = Database()
+    await db.connect()
+    try:
+        stats = await db.get_stats()
+    finally:
+        await db.close()
+    print(f"📦 {stats['bounties']} bounties, {stats['new_last_day']} new in the last day")
+    print(f"🕒 Last new bounty: {stats['last_new_bounty'] or 'never'}, last saved: {stats['last_saved'] or 'never'}")
+    print(f"👥 {stats['subscriptions']} subscriptions")
+    print(f"📬 Notifications: {stats['notifications_pending']} pending, "
+          f"{stats['notifications_sent']} sent, {stats['notifications_failed']} failed")
+
+
+def subscriptions(argv: List[str]):
+    from subscriptions import main
+    main(argv, prog="cli.py subscriptions")
+
+
+def replay(argv: List[str]):
+    from replay import main
+    main(argv)
+
+
+COMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    'scrape': scrape,
+    'daemon': daemon,
+    'notify-test': notify_test,
+    'db-stats': db_stats,
+    'subscriptions': subscriptions,
+    'replay': replay,
+}
+
+COMMAND_HELP = {
+    'scrape': "scrape once, store new bounties and send notifications",
+    'daemon': "keep a warm browser running and poll continuously",
+    'notify-test': "send a test message to TELEGRAM_CHAT_ID (and RECIPIENT_EMAIL)",
+    'db-stats': "show stored bounties, subscriptions and pending notifications",
+    'subscriptions': "add, remove or list subscribers' notification rules",
+    'replay': "serve a bounties page fixture on localhost",
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Replit bounty hunter",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<13} {text}" for name, text in COMMAND_HELP.items()),
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='COMMAND', help="see below, COMMAND --help for its options")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()  # Load environment variables from .env file, once for every command
+    COMMANDS[args.command](args.args)
+
+
+if __name__ == "__main__":
+    main()
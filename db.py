@@ -1,19 +1,41 @@
-import asyncpg
+import hashlib
 import os
-from typing import List, Dict
+import re
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 from datetime import datetime
+from bounty import CENTS_PER_CYCLE, Bounty
+
+# scrape_state key set once the rows stored under older ID schemes have been re-keyed
+LEGACY_IDS_MIGRATED = 'migrated:link_ids'
+
+# scrape_state key set once first_seen / last_seen of rows from before those columns are backfilled
+HISTORY_BACKFILLED = 'migrated:first_seen'
+
+
+def bounty_fingerprint(link: Optional[str], author: str, price_cents: Optional[int], description: str) -> str:
+    """Stable bounty ID: blake2b over the canonical link, or the other fields for a card without one"""
+    # The link is the same whether the bounty was read from the API or a card,
+    # unlike the price and description texts
+    values = (link,) if link else (author, str(price_cents or ''), description)
+    normalized = '\x1f'.join(re.sub(r'\s+', ' ', (value or '')).strip().lower() for value in values)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
 
 class Database:
-    def __init__(self):
+    def __init__(self, database_url: Optional[str] = None):
+        # Falls back to DATABASE_URL when connecting
+        self.database_url = database_url
         self.pool = None
         
     async def connect(self):
         """Connect to the database and create pool"""
         if not self.pool:
-            database_url = os.getenv('DATABASE_URL')
+            database_url = self.database_url or os.getenv('DATABASE_URL')
             if not database_url:
                 raise ValueError("DATABASE_URL environment variable is not set")
             
+            # Imported here so commands that never touch the database start faster
+            import asyncpg
             self.pool = await asyncpg.create_pool(database_url)
             
             # Create table if it doesn't exist
@@ -28,11 +50,163 @@ class Database:
                         link TEXT,
                         time_info TEXT,
                         status TEXT,
-                        cycles TEXT,
+                        cycles BIGINT,
+                        price_cents BIGINT,
+                        deadline TIMESTAMP WITH TIME ZONE,
                         scraped_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                        first_seen TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                        last_seen TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                # History columns, added to tables created before bounties were kept. No default
+                # yet, existing rows are backfilled from their own timestamps (_backfill_history)
+                await conn.execute('''
+                    ALTER TABLE bounties
+                        ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP WITH TIME ZONE,
+                        ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP WITH TIME ZONE
+                ''')
+                await self._migrate_numeric_columns(conn)
+                # The fingerprint is the primary key, so it is indexed already
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS bounties_scraped_at_idx ON bounties (scraped_at)
+                ''')
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS bounties_first_seen_idx ON bounties (first_seen)
+                ''')
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS bounties_price_cents_idx ON bounties (price_cents)
+                ''')
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS bounties_deadline_idx ON bounties (deadline)
+                ''')
+                # Small key/value store for state kept between polls
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS scrape_state (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                # Per-subscriber notification rules (see subscriptions.py)
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS subscriptions (
+                        id SERIAL PRIMARY KEY,
+                        chat_id TEXT NOT NULL,
+                        min_price_cents BIGINT,
+                        max_price_cents BIGINT,
+                        keywords TEXT[] NOT NULL DEFAULT '{}',
+                        exclude_keywords TEXT[] NOT NULL DEFAULT '{}',
+                        authors TEXT[] NOT NULL DEFAULT '{}',
                         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
+                # Notifications to send, written with the bounties they are about (see outbox.py)
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS notification_outbox (
+                        id BIGSERIAL PRIMARY KEY,
+                        idempotency_key TEXT NOT NULL UNIQUE,
+                        chat_id TEXT NOT NULL,
+                        bounty_id TEXT NOT NULL,
+                        bounty TEXT NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        locked_until TIMESTAMP WITH TIME ZONE,
+                        last_error TEXT,
+                        sent_at TIMESTAMP WITH TIME ZONE,
+                        failed_at TIMESTAMP WITH TIME ZONE,
+                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS notification_outbox_pending_idx
+                        ON notification_outbox (next_attempt_at)
+                        WHERE sent_at IS NULL AND failed_at IS NULL
+                ''')
+                await self._backfill_history(conn)
+                await self._migrate_legacy_ids(conn)
+    
+    async def _migrate_numeric_columns(self, conn):
+        """Give tables from before prices were parsed numeric price, cycles and deadline columns"""
+        cycles_type = await conn.fetchval('''
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'bounties' AND column_name = 'cycles'
+        ''')
+        if cycles_type != 'text':
+            return
+        async with conn.transaction():
+            await conn.execute('''
+                ALTER TABLE bounties
+                    ADD COLUMN IF NOT EXISTS price_cents BIGINT,
+                    ADD COLUMN IF NOT EXISTS deadline TIMESTAMP WITH TIME ZONE,
+                    ALTER COLUMN cycles TYPE BIGINT
+                        USING NULLIF(NULLIF(regexp_replace(cycles, '[^0-9]', '', 'g'), ''), '0')::BIGINT
+            ''')
+            # Same rule as bounty.parse_price_cents: the "$1,234.50" price, else the cycles
+            await conn.execute(r'''
+                UPDATE bounties SET price_cents = COALESCE(
+                    round(replace(substring(price from '\$\s*([0-9][0-9,]*(?:\.[0-9]+)?)'), ',', '')::numeric * 100),
+                    cycles * $1
+                )
+            ''', CENTS_PER_CYCLE)
+        print("🔢 Migrated bounty prices and cycles to numeric columns")
+    
+    async def _backfill_history(self, conn):
+        """Date first_seen / last_seen of rows stored before those columns existed, once"""
+        if await conn.fetchval('SELECT 1 FROM scrape_state WHERE key = $1', HISTORY_BACKFILLED):
+            return
+        async with conn.transaction():
+            # LEAST also repairs rows an earlier version stamped with the time of the upgrade
+            await conn.execute('''
+                UPDATE bounties SET
+                    first_seen = LEAST(first_seen, created_at, scraped_at),
+                    last_seen = COALESCE(scraped_at, last_seen)
+            ''')
+            await conn.execute('''
+                ALTER TABLE bounties
+                    ALTER COLUMN first_seen SET DEFAULT CURRENT_TIMESTAMP,
+                    ALTER COLUMN last_seen SET DEFAULT CURRENT_TIMESTAMP
+            ''')
+            await conn.execute('''
+                INSERT INTO scrape_state (key, value) VALUES ($1, 'done')
+                ON CONFLICT (key) DO NOTHING
+            ''', HISTORY_BACKFILLED)
+    
+    async def _migrate_legacy_ids(self, conn):
+        """Re-key rows stored with hash() or content fingerprint IDs to link IDs, once"""
+        if await conn.fetchval('SELECT 1 FROM scrape_state WHERE key = $1', LEGACY_IDS_MIGRATED):
+            return
+        async with conn.transaction():
+            # A bounty stored twice under different content IDs collapses into one row. Cards
+            # without a link keep matching only if their description fit in the stored 200 characters.
+            rows = [
+                row for row in await conn.fetch('SELECT * FROM bounties')
+                if row['id'] != bounty_fingerprint(row['link'], row['author'], row['price_cents'], row['description'])
+            ]
+            if rows:
+                await conn.execute('DELETE FROM bounties WHERE id = ANY($1::text[])', [row['id'] for row in rows])
+                # The history carries over, merged rows keep the earliest first_seen
+                await conn.executemany('''
+                    INSERT INTO bounties (
+                        id, title, price, description, author, link, time_info, status, cycles,
+                        price_cents, deadline, scraped_at, created_at, first_seen, last_seen
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+                    ON CONFLICT (id) DO UPDATE SET
+                        first_seen = LEAST(bounties.first_seen, EXCLUDED.first_seen),
+                        last_seen = GREATEST(bounties.last_seen, EXCLUDED.last_seen)
+                ''', [
+                    (bounty_fingerprint(row['link'], row['author'], row['price_cents'], row['description']),
+                     row['title'], row['price'], row['description'], row['author'], row['link'],
+                     row['time_info'], row['status'], row['cycles'], row['price_cents'], row['deadline'],
+                     row['scraped_at'], row['created_at'], row['first_seen'], row['last_seen'])
+                    for row in rows
+                ])
+                print(f"🔑 Migrated {len(rows)} bounties to link IDs")
+            # Skip the full-table scan on every later connect
+            await conn.execute('''
+                INSERT INTO scrape_state (key, value) VALUES ($1, 'done')
+                ON CONFLICT (key) DO NOTHING
+            ''', LEGACY_IDS_MIGRATED)
     
     async def close(self):
         """Close the database connection pool"""
@@ -40,38 +214,55 @@ class Database:
             await self.pool.close()
             self.pool = None
     
-    async def save_bounties(self, bounties: List[Dict]):
-        """Save bounties to database, replacing all existing ones"""
+    async def save_bounties(self, bounties: List[Bounty], notifications: Iterable[Tuple[str, Bounty]] = ()):
+        """Upsert the bounties and queue their notifications (once per chat and bounty) in one transaction"""
         if not self.pool:
             await self.connect()
             
-        async with self.pool.acquire() as conn:
-            # Start a transaction
-            async with conn.transaction():
-                # First, delete all existing bounties
-                await conn.execute('DELETE FROM bounties')
-                
-                # Then insert the new bounties
-                for bounty in bounties:
-                    await conn.execute('''
-                        INSERT INTO bounties (
-                            id, title, price, description, author, link, 
-                            time_info, status, cycles, scraped_at
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    ''', 
-                    bounty['id'],  # Store ID as text
-                    bounty['title'],
-                    bounty['price'],
-                    bounty['description'],
-                    bounty['author'],
-                    bounty['link'],
-                    bounty['time_info'],
-                    bounty['status'],
-                    bounty['cycles'],
-                    datetime.fromisoformat(bounty['scraped_at'])
-                    )
+        async with self.pool.acquire() as conn, conn.transaction():
+            await conn.executemany('''
+                INSERT INTO bounties (
+                    id, title, price, description, author, link,
+                    time_info, status, cycles, price_cents, deadline, scraped_at, first_seen, last_seen
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $12, $12)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    time_info = EXCLUDED.time_info,
+                    status = EXCLUDED.status,
+                    cycles = EXCLUDED.cycles,
+                    price_cents = EXCLUDED.price_cents,
+                    deadline = EXCLUDED.deadline,
+                    scraped_at = EXCLUDED.scraped_at,
+                    last_seen = EXCLUDED.last_seen
+            ''', [
+                (
+                    bounty.id,
+                    bounty.title,
+                    bounty.price,
+                    bounty.description,
+                    bounty.author,
+                    bounty.link,
+                    bounty.time_info,
+                    bounty.status,
+                    bounty.cycles,
+                    bounty.price_cents,
+                    bounty.deadline,
+                    bounty.scraped_at
+                )
+                for bounty in bounties
+            ])
+            notifications = list(notifications)
+            if notifications:
+                await conn.executemany('''
+                    INSERT INTO notification_outbox (idempotency_key, chat_id, bounty_id, bounty)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (idempotency_key) DO NOTHING
+                ''', [
+                    (f"{chat_id}:{bounty.id}", chat_id, bounty.id, bounty.to_json())
+                    for chat_id, bounty in notifications
+                ])
     
-    async def get_previous_bounties(self) -> List[Dict]:
+    async def get_previous_bounties(self) -> List[Bounty]:
         """Get all stored bounties"""
         if not self.pool:
             await self.connect()
@@ -82,4 +273,197 @@ class Database:
                 ORDER BY scraped_at DESC
             ''')
             
-            return [dict(row) for row in rows] 
\ No newline at end of file
+            return [Bounty.from_row(row) for row in rows]
+    
+    async def get_new_ids(self, ids: List[str]) -> Set[str]:
+        """Return the IDs from `ids` that aren't stored yet, in one query"""
+        if not ids:
+            return set()
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT id FROM unnest($1::text[]) AS current(id)
+                EXCEPT
+                SELECT id FROM bounties
+            ''', ids)
+            
+            return {row['id'] for row in rows}
+    
+    async def has_bounties(self) -> bool:
+        """Check whether any bounty has been stored yet"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval('SELECT EXISTS (SELECT 1 FROM bounties)')
+    
+    async def get_arrival_counts(self, days: int = 14) -> Tuple[Dict[int, int], float]:
+        """New bounties per UTC hour of the day over the last `days` days, and how many days that covers"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT EXTRACT(HOUR FROM first_seen AT TIME ZONE 'UTC')::int AS hour,
+                       COUNT(*) AS arrivals,
+                       EXTRACT(EPOCH FROM NOW() - MIN(MIN(first_seen)) OVER ()) AS span
+                FROM bounties
+                WHERE first_seen > NOW() - make_interval(days => $1)
+                GROUP BY hour
+            ''', days)
+            if not rows:
+                return {}, 0
+            # At least a day, a few hours of history shouldn't look like a busy day
+            span_days = max(float(rows[0]['span']) / 86400, 1)
+            return {row['hour']: row['arrivals'] for row in rows}, span_days
+    
+    async def get_state(self, key: str) -> Optional[str]:
+        """Read a value from the scrape state table (None if it was never set)"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval('SELECT value FROM scrape_state WHERE key = $1', key)
+    
+    async def set_state(self, key: str, value: str):
+        """Store a value in the scrape state table"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO scrape_state (key, value, updated_at)
+                VALUES ($1, $2, CURRENT_TIMESTAMP)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = EXCLUDED.value,
+                    updated_at = EXCLUDED.updated_at
+            ''', key, value)
+    
+    async def get_subscriptions(self) -> List[Dict]:
+        """Load every subscription rule"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT id, chat_id, min_price_cents, max_price_cents, keywords, exclude_keywords, authors
+                FROM subscriptions
+                ORDER BY id
+            ''')
+            return [dict(row) for row in rows]
+    
+    async def add_subscription(self, chat_id: str, min_price_cents: Optional[int] = None,
+                               max_price_cents: Optional[int] = None, keywords: List[str] = (),
+                               exclude_keywords: List[str] = (), authors: List[str] = ()) -> int:
+        """Store a subscription rule and return its ID"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval('''
+                INSERT INTO subscriptions (
+                    chat_id, min_price_cents, max_price_cents, keywords, exclude_keywords, authors
+                ) VALUES ($1, $2, $3, $4, $5, $6)
+                RETURNING id
+            ''', chat_id, min_price_cents, max_price_cents,
+                list(keywords), list(exclude_keywords), list(authors))
+    
+    async def delete_subscription(self, subscription_id: int) -> bool:
+        """Delete a subscription rule, False if there was none with that ID"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            result = await conn.execute('DELETE FROM subscriptions WHERE id = $1', subscription_id)
+            return result != 'DELETE 0'
+    
+    async def claim_notifications(self, limit: int, lease_seconds: float = 120) -> List[Dict]:
+        """Lease up to `limit` due notifications, oldest first, skipping rows other workers hold"""
+        if not self.pool:
+            await self.connect()
+            
+        # A lease that runs out (the worker died mid-send) makes the rows due again
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                UPDATE notification_outbox
+                SET locked_until = CURRENT_TIMESTAMP + make_interval(secs => $2)
+                WHERE id IN (
+                    SELECT id FROM notification_outbox
+                    WHERE sent_at IS NULL AND failed_at IS NULL
+                        AND next_attempt_at <= CURRENT_TIMESTAMP
+                        AND (locked_until IS NULL OR locked_until < CURRENT_TIMESTAMP)
+                    ORDER BY id
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, idempotency_key, chat_id, bounty_id, bounty, attempts, created_at
+            ''', limit, float(lease_seconds))
+            return sorted((dict(row) for row in rows), key=lambda row: row['id'])
+    
+    async def mark_notifications_sent(self, ids: List[int]):
+        """Record that the notifications were delivered"""
+        if not ids:
+            return
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE notification_outbox
+                SET sent_at = CURRENT_TIMESTAMP, locked_until = NULL, last_error = NULL
+                WHERE id = ANY($1::bigint[])
+            ''', ids)
+    
+    async def retry_notifications(self, ids: List[int], error: str, backoff_seconds: float, max_attempts: int):
+        """Count a failed attempt and schedule the next one with exponential backoff, or give up"""
+        if not ids:
+            return
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE notification_outbox
+                SET attempts = attempts + 1,
+                    last_error = $2,
+                    locked_until = NULL,
+                    next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => $3 * power(2, attempts)),
+                    failed_at = CASE WHEN attempts + 1 >= $4 THEN CURRENT_TIMESTAMP END
+                WHERE id = ANY($1::bigint[])
+            ''', ids, error, float(backoff_seconds), max_attempts)
+    
+    async def defer_notifications(self, ids: List[int], until: datetime):
+        """Hand leased notifications back without counting an attempt, due again at `until`"""
+        if not ids:
+            return
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE notification_outbox
+                SET next_attempt_at = $2, locked_until = NULL
+                WHERE id = ANY($1::bigint[])
+            ''', ids, until)
+    
+    async def get_stats(self) -> Dict:
+        """Counts of stored bounties, subscriptions and notifications by state"""
+        if not self.pool:
+            await self.connect()
+            
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow('''
+                SELECT
+                    (SELECT COUNT(*) FROM bounties) AS bounties,
+                    (SELECT COUNT(*) FROM bounties WHERE first_seen > NOW() - INTERVAL '1 day') AS new_last_day,
+                    (SELECT MAX(first_seen) FROM bounties) AS last_new_bounty,
+                    (SELECT MAX(last_seen) FROM bounties) AS last_saved,
+                    (SELECT COUNT(*) FROM subscriptions) AS subscriptions,
+                    (SELECT COUNT(*) FROM notification_outbox
+                     WHERE sent_at IS NULL AND failed_at IS NULL) AS notifications_pending,
+                    (SELECT COUNT(*) FROM notification_outbox WHERE sent_at IS NOT NULL) AS notifications_sent,
+                    (SELECT COUNT(*) FROM notification_outbox WHERE failed_at IS NOT NULL) AS notifications_failed
+            ''')
+            return dict(row)
@@ -0,0 +1,175 @@
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+PREFIX = "bounty_scraper"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name -> (type, help) of every metric the scraper exports
+METRICS = {
+    'phase_seconds': ('histogram', "Duration of each scrape pipeline phase"),
+    'runs_total': ('counter', "Scrape cycles started"),
+    'run_failures_total': ('counter', "Scrape cycles that raised an error"),
+    'cards_found_total': ('counter', "Bounty cards extracted"),
+    'new_bounties_total': ('counter', "Bounties that weren't stored yet"),
+    'selector_fallbacks_total': ('counter', "Scrapes where the preferred card selector matched nothing"),
+    'api_extractions_total': ('counter', "Scrapes served from the page's API responses"),
+    'http_scrapes_total': ('counter', "Sources read over plain HTTP in HTTP mode"),
+    'http_fallbacks_total': ('counter', "Sources HTTP mode handed to the browser"),
+    'unchanged_polls_total': ('counter', "Polls skipped because the bounty list hadn't changed"),
+    'requests_blocked_total': ('counter', "Page requests aborted by lean mode, by resource type"),
+    'page_bytes_total': ('counter', "Bytes transferred while loading the bounties page"),
+    'page_bytes_saved_total': ('counter', "Bytes lean mode saved compared with the last normal page load"),
+    'notifications_sent_total': ('counter', "Telegram messages sent"),
+    'notify_failures_total': ('counter', "Telegram messages given up on"),
+    'emails_sent_total': ('counter', "Notification emails sent"),
+    'email_failures_total': ('counter', "Notification emails given up on"),
+    'browser_rss_bytes': ('gauge', "Resident memory of the Playwright driver and Chromium"),
+    'last_run_timestamp_seconds': ('gauge', "Unix time the last scrape cycle finished"),
+    'poll_interval_seconds': ('gauge', "Wait before the next poll in daemon mode"),
+    'expected_arrivals_per_hour': ('gauge', "New bounties per hour the poll scheduler expects"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Metrics:
+    """Counters, gauges and histograms rendered in the Prometheus text format"""
+
+    def __init__(self, prefix: str = PREFIX, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.values: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self.callbacks: Dict[str, Callable[[], float]] = {}
+
+    def _check(self, name: str, kind: str):
+        if METRICS.get(name, (None,))[0] != kind:
+            raise ValueError(f"Unknown {kind} metric: {name}")
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Increase a counter"""
+        self._check(name, 'counter')
+        series = self.values.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        self._check(name, 'gauge')
+        self.values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a histogram"""
+        self._check(name, 'histogram')
+        series = self.histograms.setdefault(name, {})
+        # Bucket counts (non-cumulative), then sum and count
+        state = series.setdefault(tuple(sorted(labels.items())), [0.0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def track(self, name: str, callback: Callable[[], float]):
+        """Read a counter or gauge from `callback` whenever metrics are rendered"""
+        if name not in METRICS or METRICS[name][0] == 'histogram':
+            raise ValueError(f"Can't track metric: {name}")
+        self.callbacks[name] = callback
+
+    def get(self, name: str, **labels) -> float:
+        """Current value of a counter or gauge (0 if never set)"""
+        if name in self.callbacks:
+            return self.callbacks[name]()
+        return self.values.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            full_name = f"{self.prefix}_{name}"
+            if kind == 'histogram':
+                series = self.histograms.get(name)
+                if not series:
+                    continue
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, state in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} "
+                                     f"{_format_value(cumulative)}")
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', '+Inf'))} "
+                                 f"{_format_value(state[-1])}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(state[-2])}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {_format_value(state[-1])}")
+                continue
+
+            if name in self.callbacks:
+                try:
+                    series = {(): self.callbacks[name]()}
+                except Exception:
+                    continue
+            else:
+                series = self.values.get(name)
+            if not series:
+                continue
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write the metrics for node_exporter's textfile collector (atomically)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    async def serve(self, port: int, host: str = '127.0.0.1') -> asyncio.AbstractServer:
+        """Serve GET /metrics over plain HTTP until the returned server is closed"""
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request_line = await reader.readline()
+                # Skip the headers, we don't need any of them
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                parts = request_line.decode('latin-1').split()
+                if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                    status, body = "200 OK", self.render()
+                else:
+                    status, body = "404 Not Found", "not found\n"
+                data = body.encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: close\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        print(f"📈 Serving metrics on http://{host}:{server.sockets[0].getsockname()[1]}/metrics")
+        return server
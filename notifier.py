@@ -0,0 +1,288 @@
+import asyncio
+import os
+import re
+import smtplib
+import ssl
+from email.message import EmailMessage
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# Telegram allows about 30 messages per second overall and 1 per second per chat
+GLOBAL_RATE = 30
+PER_CHAT_RATE = 1
+
+# Telegram rejects messages longer than this (counted in UTF-16 code units)
+MESSAGE_LIMIT = 4096
+
+# Room kept free in every digest message for its header line
+DIGEST_HEADER_RESERVE = 64
+
+# Chat IDs with this prefix are email addresses, delivered by EmailNotifier
+EMAIL_PREFIX = "mailto:"
+
+
+def create_http_session(headers: Optional[Dict[str, str]] = None) -> 'aiohttp.ClientSession':
+    """Pooled keep-alive HTTP session, shared setup of the Telegram client and HTTP scraping"""
+    import aiohttp
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=30),
+        headers=headers
+    )
+
+
+def escape_markdown(text: str) -> str:
+    """Escape the characters Telegram's (legacy) Markdown mode treats as markup"""
+    return re.sub(r'([_*`\[])', r'\\\1', text)
+
+
+def telegram_len(text: str) -> int:
+    """Message length the way Telegram counts it"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def pack_digest(entries: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Pack digest entries into as few messages as fit under Telegram's length limit"""
+    return [message for message, _ in pack_digest_counted(entries, limit)]
+
+
+def pack_digest_counted(entries: List[str], limit: int = MESSAGE_LIMIT) -> List[Tuple[str, int]]:
+    """Like pack_digest, with the number of entries that went into each message"""
+    budget = limit - DIGEST_HEADER_RESERVE
+    chunks: List[List[str]] = []
+    size = 0
+    for entry in entries:
+        entry_size = telegram_len(entry) + 2  # blank line between entries
+        if not chunks or size + entry_size > budget:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(entry)
+        size += entry_size
+
+    messages = []
+    for i, chunk in enumerate(chunks, 1):
+        header = f"🎯 *{len(chunk)} new Replit {'bounty' if len(chunk) == 1 else 'bounties'}*"
+        if len(chunks) > 1:
+            header += f" ({i}/{len(chunks)})"
+        messages.append((header + "\n\n" + "\n\n".join(chunk), len(chunk)))
+    return messages
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = None
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self.updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramNotifier:
+    """Sends Telegram messages over one keep-alive session, within Telegram's rate limits"""
+
+    def __init__(self, bot_token: str, api_url: str = TELEGRAM_API_URL,
+                 global_rate: float = GLOBAL_RATE, per_chat_rate: float = PER_CHAT_RATE,
+                 max_retries: int = 5):
+        self.bot_token = bot_token
+        self.api_url = api_url
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self.session: Optional['aiohttp.ClientSession'] = None
+        # For the bot as a whole and per chat, so different chats can be sent to concurrently
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.sent = 0
+        self.failed = 0
+
+    async def start(self):
+        """Open the shared HTTP session"""
+        if self.session is None or self.session.closed:
+            self.session = create_http_session()
+
+    async def close(self):
+        """Close the HTTP session"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def send_message(self, chat_id: str, text: str, parse_mode: str = 'Markdown') -> bool:
+        """Send one message right away (still rate limited), retrying 429s and server errors"""
+        import aiohttp
+        bucket = self.chat_buckets.setdefault(chat_id, TokenBucket(self.per_chat_rate))
+        backoff = 1.0
+
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                status, payload = await self._post(chat_id, text, parse_mode)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, payload = None, {'description': str(e)}
+
+            if status == 200:
+                self.sent += 1
+                return True
+
+            if attempt == self.max_retries:
+                break
+            if status == 429:
+                retry_after = (payload.get('parameters') or {}).get('retry_after', backoff)
+                print(f"⏳ Telegram rate limit hit, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+            elif status is None or status >= 500:
+                await asyncio.sleep(backoff)
+                backoff *= 2
+            else:
+                # Bad request, blocked bot, etc. won't succeed on retry
+                break
+
+        self.failed += 1
+        print(f"❌ Failed to send notification: {payload.get('description', payload)}")
+        return False
+
+    async def _post(self, chat_id: str, text: str, parse_mode: str) -> Tuple[int, Dict]:
+        await self.start()
+        url = f"{self.api_url}/bot{self.bot_token}/sendMessage"
+        data = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': parse_mode
+        }
+        async with self.session.post(url, data=data) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                payload = {'description': await response.text()}
+            return response.status, payload
+
+
+def reconnectable(error: OSError) -> bool:
+    """Whether a failed send is worth retrying on a fresh SMTP session"""
+    # Other SMTP replies (bad login, refused recipient) won't change, and repeated logins can lock
+    # the account. SMTPException subclasses OSError, so socket errors are told apart explicitly.
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return not isinstance(error, smtplib.SMTPException)
+
+
+class EmailNotifier:
+    """Sends email over one persistent SMTP session"""
+
+    def __init__(self, host: str, port: int = 587, username: Optional[str] = None,
+                 password: Optional[str] = None, sender: Optional[str] = None,
+                 starttls: bool = True, timeout: float = 30, max_retries: int = 2):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # Opened on first use and reopened when dropped. smtplib blocks, so calls run
+        # in a worker thread, one at a time on the shared connection.
+        self.smtp: Optional[smtplib.SMTP] = None
+        self.lock = asyncio.Lock()
+        self.connections = 0
+        self.sent = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['EmailNotifier']:
+        """Configure from SENDER_EMAIL / SENDER_PASSWORD (and SMTP_HOST / SMTP_PORT), None if unset"""
+        sender = os.getenv('SENDER_EMAIL')
+        password = os.getenv('SENDER_PASSWORD')
+        if not sender or not password:
+            return None
+        return cls(
+            host=os.getenv('SMTP_HOST', 'smtp.mail.yahoo.com'),
+            port=int(os.getenv('SMTP_PORT', '587')),
+            username=sender,
+            password=password,
+        )
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.smtp = smtp
+        self.connections += 1
+
+    def _send(self, message: EmailMessage):
+        if self.smtp is None:
+            self._connect()
+        self.smtp.send_message(message)
+
+    def _disconnect(self, quit: bool = False):
+        if self.smtp is None:
+            return
+        try:
+            if quit:
+                self.smtp.quit()
+            else:
+                self.smtp.close()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+        self.smtp = None
+
+    async def send(self, recipient: str, subject: str, body: str) -> bool:
+        """Send one plain text email, reconnecting if the session was dropped"""
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = subject
+        message.set_content(body)
+
+        error: Optional[Exception] = None
+        async with self.lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await asyncio.to_thread(self._send, message)
+                    self.sent += 1
+                    return True
+                except OSError as e:
+                    error = e
+                    if not reconnectable(e):
+                        # The session itself is fine (smtplib has reset it), keep it for the next email
+                        break
+                    self._disconnect()
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(2 ** attempt)
+
+        self.failed += 1
+        print(f"❌ Failed to send email: {error}")
+        return False
+
+    async def close(self):
+        """Log out and close the SMTP session"""
+        async with self.lock:
+            if self.smtp is not None:
+                await asyncio.to_thread(self._disconnect, True)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from bounty import Bounty
+from db import Database
+from metrics import Metrics
+from notifier import EMAIL_PREFIX, EmailNotifier, TelegramNotifier, pack_digest_counted
+
+
+class OutboxWorker:
+    """Drains the notification outbox into Telegram (and email), at least once per notification"""
+
+    def __init__(self, db: Database, notifier: TelegramNotifier,
+                 format_message: Callable[[Bounty], str], format_entry: Callable[[Bounty], str],
+                 digest: bool = False, digest_max_items: int = 50, digest_max_delay: float = 0,
+                 batch_size: int = 100, max_attempts: int = 8, backoff_seconds: float = 30,
+                 lease_seconds: float = 120, poll_interval: float = 5,
+                 email: Optional[EmailNotifier] = None,
+                 format_email: Optional[Callable[[List[Bounty]], Tuple[str, str]]] = None,
+                 metrics: Optional[Metrics] = None):
+        self.db = db
+        self.notifier = notifier
+        self.format_message = format_message
+        self.format_entry = format_entry
+        self.digest = digest
+        self.digest_max_items = digest_max_items
+        self.digest_max_delay = digest_max_delay
+        self.batch_size = max(batch_size, digest_max_items) if digest else batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.email = email
+        self.format_email = format_email
+        self.metrics = metrics
+        self.wakeup = asyncio.Event()
+        self.running = False
+
+    def wake(self):
+        """Have the background worker check for new notifications right away"""
+        self.wakeup.set()
+
+    async def drain(self, force: bool = False) -> int:
+        """Send everything that is due (held back digests too with `force`), return how many messages went out"""
+        sent = 0
+        while True:
+            rows = await self.db.claim_notifications(self.batch_size, self.lease_seconds)
+            if not rows:
+                return sent
+            by_chat: Dict[str, List[Dict]] = {}
+            for row in rows:
+                by_chat.setdefault(row['chat_id'], []).append(row)
+            results = await asyncio.gather(*(
+                self._deliver(chat_id, chat_rows, force) for chat_id, chat_rows in by_chat.items()
+            ))
+            sent += sum(results)
+
+    async def run(self):
+        """Drain the outbox whenever woken, and every `poll_interval` seconds for retries"""
+        self.running = True
+        try:
+            while True:
+                self.wakeup.clear()
+                try:
+                    await self.drain()
+                except Exception as e:
+                    print(f"❌ Notification outbox failed: {e}")
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+
+    async def _timed_send(self, send: Awaitable[bool]) -> bool:
+        started = time.perf_counter()
+        try:
+            return await send
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe('phase_seconds', time.perf_counter() - started, phase='send')
+
+    async def _deliver(self, chat_id: str, rows: List[Dict], force: bool) -> int:
+        bounties = [Bounty.from_json(row['bounty']) for row in rows]
+        sent_ids: List[int] = []
+        failed_ids: List[int] = []
+        messages = 0
+
+        if chat_id.startswith(EMAIL_PREFIX):
+            subject, body = self.format_email(bounties)
+            if self.email is not None and await self._timed_send(
+                    self.email.send(chat_id[len(EMAIL_PREFIX):], subject, body)):
+                sent_ids = [row['id'] for row in rows]
+                messages = 1
+            else:
+                failed_ids = [row['id'] for row in rows]
+        elif self.digest:
+            # Held back until enough bounties are pending or the oldest has waited long enough
+            oldest = min(row['created_at'] for row in rows)
+            ready_at = oldest + timedelta(seconds=self.digest_max_delay)
+            if not force and len(rows) < self.digest_max_items and ready_at > datetime.now(oldest.tzinfo):
+                await self.db.defer_notifications([row['id'] for row in rows], ready_at)
+                return 0
+            packed = pack_digest_counted([self.format_entry(bounty) for bounty in bounties])
+            start = 0
+            for message, count in packed:
+                ids = [row['id'] for row in rows[start:start + count]]
+                start += count
+                if await self._timed_send(self.notifier.send_message(chat_id, message)):
+                    sent_ids.extend(ids)
+                    messages += 1
+                else:
+                    failed_ids.extend(ids)
+        else:
+            for row, bounty in zip(rows, bounties):
+                if await self._timed_send(self.notifier.send_message(chat_id, self.format_message(bounty))):
+                    sent_ids.append(row['id'])
+                    messages += 1
+                else:
+                    failed_ids.append(row['id'])
+
+        # A crash before this sends the rows again once their lease runs out
+        await self.db.mark_notifications_sent(sent_ids)
+        await self.db.retry_notifications(failed_ids, "Send failed",
+                                          self.backoff_seconds, self.max_attempts)
+        if failed_ids:
+            print(f"⏳ {len(failed_ids)} notification(s) for chat {chat_id} will be retried")
+        return messages
@@ -0,0 +1,191 @@
+import argparse
+import html
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# One bounty card, using the same markup/classes the scraper's selectors expect
+CARD_TEMPLATE = """<li class="Surface_surfaceRoot__TeA2u css-r1hogs">
+  <div class="Surface_surfaceDefault__TcNI5"><span>{status}</span></div>
+  <h3><a href="{href}">{title}</a></h3>
+  <span class="Text_text__T_hn_">{description}</span>
+  <span class="css-4qqdjk">{price}</span>
+  <div class="css-pvu419"><span>{cycles}</span></div>
+  <a class="css-1yzry6v" href="/@{author}"><span class="Text_text__T_hn_">{author}</span></a>
+  <div class="css-149xez1"><span>{time_info}</span></div>
+</li>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>Bounties - Replit</title>
+  <link rel="stylesheet" href="/static/app.css">
+</head>
+<body>
+  <img src="/static/hero.png" alt="">
+  <input placeholder="Search for a Bounty">
+  <ul id="bounties">{cards}</ul>
+  {data}{script}
+</body>
+</html>"""
+
+# Stand-ins for the page's assets, so lean mode has something to skip
+STATIC_ASSETS = {
+    '/static/app.css': ('text/css', "body { margin: 0 }\n" + "/* padding */\n" * 4000),
+    '/static/hero.png': ('image/png', "x" * 200_000),
+}
+
+# Page data embedded for the client the way Next.js does it, read by HTTP mode
+NEXT_DATA_TEMPLATE = '<script id="__NEXT_DATA__" type="application/json">%s</script>'
+
+# Renders the cards from the /graphql response, like the real page does
+CLIENT_SCRIPT = """<script>
+const escape = (s) => String(s).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+const template = %s;
+fetch('/graphql', {method: 'POST', headers: {'content-type': 'application/json'}, body: '{}'})
+  .then(r => r.json())
+  .then(payload => {
+    document.getElementById('bounties').innerHTML = payload.data.bountySearch.items.map(b => template
+      .replaceAll('{status}', escape(b.status))
+      .replaceAll('{href}', escape(`/bounties/@${b.user.username}/${b.slug}`))
+      .replaceAll('{title}', escape(b.title))
+      .replaceAll('{description}', escape(b.descriptionPreview))
+      .replaceAll('{price}', escape('$' + (b.cycles / 100).toLocaleString('en-US')))
+      .replaceAll('{cycles}', escape(b.cycles.toLocaleString('en-US')))
+      .replaceAll('{author}', escape(b.user.username))
+      .replaceAll('{time_info}', 'Due soon')
+    ).join('');
+  });
+</script>"""
+
+
+def synthetic_bounties(count: int) -> List[Dict]:
+    """Fake bounties in the shape of Replit's GraphQL API, newest first"""
+    return [{
+        '__typename': 'Bounty',
+        'id': 100000 + count - i,
+        'title': f"Synthetic bounty #{count - i}",
+        'slug': f"synthetic-bounty-{count - i}",
+        'cycles': 1000 * (1 + (count - i) % 50),
+        'status': 'open',
+        'deadline': '2030-01-01T00:00:00.000Z',
+        'descriptionPreview': f"Fixture description for bounty {count - i}. " * 3,
+        'user': {'username': f"user_{(count - i) % 37}"},
+    } for i in range(count)]
+
+
+def render_card(item: Dict) -> str:
+    """Render one API bounty object as a bounty card"""
+    return CARD_TEMPLATE.format(
+        status=html.escape(item['status']),
+        href=html.escape(f"/bounties/@{item['user']['username']}/{item['slug']}"),
+        title=html.escape(item['title']),
+        description=html.escape(item['descriptionPreview']),
+        price=f"${item['cycles'] / 100:,.0f}",
+        cycles=f"{item['cycles']:,}",
+        author=html.escape(item['user']['username']),
+        time_info="Due soon",
+    )
+
+
+def render_bounties_page(items: List[Dict], client_rendered: bool = False, embed_data: bool = False) -> str:
+    """Render a bounties page with the cards inline or fetched from /graphql, optionally with __NEXT_DATA__"""
+    data = ""
+    if embed_data:
+        payload = {'props': {'pageProps': {'bountySearch': {'items': items}}}, 'page': '/bounties'}
+        # "</" can't appear inside a script element
+        data = NEXT_DATA_TEMPLATE % json.dumps(payload).replace('</', '<\\/')
+    if client_rendered:
+        return PAGE_TEMPLATE.format(cards="", data=data, script=CLIENT_SCRIPT % json.dumps(CARD_TEMPLATE))
+    return PAGE_TEMPLATE.format(cards="\n".join(render_card(item) for item in items), data=data, script="")
+
+
+class FixtureServer:
+    """Serves a bounties page snapshot (and its /graphql data) from localhost at `url`"""
+
+    def __init__(self, items: Optional[List[Dict]] = None, client_rendered: bool = False,
+                 snapshot: Optional[str] = None, latency_ms: int = 0, embed_data: bool = False):
+        self.items = items or []
+        self.page = snapshot if snapshot is not None else render_bounties_page(self.items, client_rendered, embed_data)
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/bounties"
+
+    def __enter__(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, content_type: str, body: str):
+                fixture.requests += 1
+                if fixture.latency_ms:
+                    time.sleep(fixture.latency_ms / 1000)
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/bounties':
+                    self._send(200, 'text/html; charset=utf-8', fixture.page)
+                elif path in STATIC_ASSETS:
+                    self._send(200, *STATIC_ASSETS[path])
+                else:
+                    self._send(404, 'text/plain', 'not found')
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if self.path == '/graphql':
+                    payload = {'data': {'bountySearch': {'items': fixture.items}}}
+                    self._send(200, 'application/json', json.dumps(payload))
+                else:
+                    self._send(404, 'text/plain', 'not found')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve a bounties page fixture on localhost")
+    parser.add_argument('--cards', type=int, default=15, help="number of synthetic cards (default: 15)")
+    parser.add_argument('--snapshot', help="serve this saved HTML page instead of synthetic cards")
+    parser.add_argument('--client-rendered', action='store_true',
+                        help="render the cards from a /graphql fetch instead of inline")
+    parser.add_argument('--embed-data', action='store_true',
+                        help="also embed the bounties as __NEXT_DATA__ JSON, like a server-rendered page")
+    args = parser.parse_args(argv)
+
+    snapshot = None
+    if args.snapshot:
+        with open(args.snapshot, encoding='utf-8') as f:
+            snapshot = f.read()
+
+    with FixtureServer(synthetic_bounties(args.cards), args.client_rendered, snapshot,
+                       embed_data=args.embed_data) as server:
+        print(f"🧪 Serving fixture at {server.url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
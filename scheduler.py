@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+# How long the hour-of-day profile is used before it is reloaded from the database
+HISTORY_TTL = timedelta(hours=1)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class PollScheduler:
+    """Picks how long to wait before the next poll from how busy the board is"""
+
+    def __init__(self, base_interval: float = 300, min_interval: float = 60, max_interval: float = 1800,
+                 target_arrivals: float = 1.0, jitter: float = 0.1, half_life: float = 3600,
+                 history_days: int = 14, rng: Optional[random.Random] = None):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.target_arrivals = target_arrivals
+        self.jitter = jitter
+        self.half_life = half_life
+        self.history_days = history_days
+        self.rng = rng or random.Random()
+        # Average new bounties per hour for each UTC hour of the day
+        self.hourly_rates: Optional[List[float]] = None
+        self.history_loaded_at: Optional[datetime] = None
+        # Moving average of new bounties per hour, a poll's weight halves every `half_life` seconds
+        self.recent_rate: Optional[float] = None
+        self.last_poll: Optional[datetime] = None
+        self.errors = 0
+        self.rate_limited = False
+        self.retry_after: Optional[float] = None
+
+    def history_stale(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now(timezone.utc)
+        return self.history_loaded_at is None or now - self.history_loaded_at > HISTORY_TTL
+
+    def load_history(self, counts: Dict[int, int], days: float, now: Optional[datetime] = None):
+        """Use the new bounties seen per UTC hour of the day over the last `days` days"""
+        self.history_loaded_at = now or datetime.now(timezone.utc)
+        if days <= 0:
+            self.hourly_rates = None
+            return
+        self.hourly_rates = [counts.get(hour, 0) / days for hour in range(24)]
+
+    def record(self, new_count: int, now: Optional[datetime] = None):
+        """Record a successful poll that found `new_count` new bounties"""
+        now = now or datetime.now(timezone.utc)
+        if self.last_poll is not None:
+            elapsed = (now - self.last_poll).total_seconds()
+            if elapsed > 0:
+                rate = new_count * 3600 / elapsed
+                if self.recent_rate is None:
+                    self.recent_rate = rate
+                else:
+                    weight = 1 - 0.5 ** (elapsed / self.half_life)
+                    self.recent_rate += weight * (rate - self.recent_rate)
+        self.last_poll = now
+        self.errors = 0
+        self.rate_limited = False
+        self.retry_after = None
+
+    def record_error(self, rate_limited: bool = False, retry_after: Optional[float] = None):
+        """Record a failed poll, optionally rate limited with the server's Retry-After (seconds)"""
+        self.errors += 1
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+    def expected_rate(self, now: Optional[datetime] = None) -> Optional[float]:
+        """New bounties per hour expected right now (None without any data)"""
+        now = now or datetime.now(timezone.utc)
+        # The recent rate blended with the one usually seen at this hour
+        usual = self.hourly_rates[now.hour] if self.hourly_rates is not None else None
+        if self.recent_rate is None:
+            return usual
+        if usual is None:
+            return self.recent_rate
+        return (self.recent_rate + usual) / 2
+
+    def next_interval(self, now: Optional[datetime] = None) -> float:
+        """Seconds to wait before the next poll"""
+        if self.errors:
+            # Exponential backoff from the base interval, one step further when rate limited
+            steps = self.errors if self.rate_limited else self.errors - 1
+            interval = self.base_interval * 2 ** min(steps, 16)
+            if self.retry_after:
+                interval = max(interval, self.retry_after)
+        else:
+            rate = self.expected_rate(now)
+            if rate is None:
+                interval = self.base_interval
+            elif rate <= 0:
+                interval = self.max_interval
+            else:
+                # Aim for `target_arrivals` new bounties per poll
+                interval = self.target_arrivals * 3600 / rate
+
+        # Jittered so polls don't fall on round times
+        interval *= 1 + self.jitter * (2 * self.rng.random() - 1)
+        return min(max(interval, self.min_interval), self.max_interval)
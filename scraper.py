@@ -1,271 +1,1269 @@
+import argparse
 import asyncio
+import hashlib
 import json
 import os
+import re
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
-from playwright.async_api import async_playwright
-import requests
-from db import Database
-from dotenv import load_dotenv
+from typing import Any, List, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+from bounty import (CENTS_PER_CYCLE, Bounty, canonical_link, format_price, parse_cycles,
+                    parse_deadline, parse_price_cents)
+from db import Database, bounty_fingerprint
+from metrics import Metrics
+from scheduler import PollScheduler, parse_retry_after
+from notifier import EMAIL_PREFIX, EmailNotifier, TelegramNotifier, create_http_session, escape_markdown
+from outbox import OutboxWorker
+from subscriptions import SubscriptionIndex, load_index
+
+BOUNTIES_URL = "https://replit.com/bounties?order=creationDateDescending"
+
+BROWSER_ARGS = [
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+]
+
+# Bounty card selectors, in order of specificity
+CARD_SELECTORS = [
+    '.Surface_surfaceRoot__TeA2u.css-r1hogs',
+    'li[class*="Surface_surfaceRoot"]',
+    'li[class*="useView_view"]',
+    'li'
+]
+
+# Bare "li" also matches navigation items, so it can't tell us the list rendered
+READY_SELECTOR = ', '.join(CARD_SELECTORS[:-1])
+
+# Walks the bounty cards in the browser and returns plain dicts, so extraction
+# costs one round trip no matter how many cards there are
+EXTRACT_CARDS_JS = """
+({selectors, offset, limit, indices}) => {
+    for (const selector of selectors) {
+        const cards = Array.from(document.querySelectorAll(selector));
+        if (cards.length === 0) {
+            continue;
+        }
+        const text = (card, query) => {
+            const el = card.querySelector(query);
+            return el ? el.innerText : null;
+        };
+        // Either the given card positions or a window of the list
+        const picked = indices
+            ? indices.map(i => cards[i]).filter(card => card)
+            : cards.slice(offset, limit == null ? cards.length : offset + limit);
+        return {
+            selector,
+            cards: picked.map(card => {
+                // Title and link both come from the h3 a element
+                const titleLink = card.querySelector('h3 a');
+                return {
+                    title: titleLink ? titleLink.innerText : null,
+                    link: titleLink ? titleLink.getAttribute('href') : null,
+                    price: text(card, '.css-4qqdjk'),
+                    description: text(card, 'h3 + span.Text_text__T_hn_'),
+                    author: text(card, '.css-1yzry6v span.Text_text__T_hn_'),
+                    time_info: text(card, '.css-149xez1 span'),
+                    status: text(card, '.Surface_surfaceDefault__TcNI5 span'),
+                    cycles: text(card, '.css-pvu419 span'),
+                };
+            }),
+        };
+    }
+    return {selector: null, cards: []};
+}
+"""
+
+# Cheap fingerprint of every card (FNV-1a over its link, author, price and
+# description), used to tell whether the list changed before paying for a full
+# extraction. Relative text like "Due in 2 days" is left out, it changes by itself.
+CARD_HASHES_JS = """
+({selectors, limit}) => {
+    for (const selector of selectors) {
+        const cards = Array.from(document.querySelectorAll(selector));
+        if (cards.length === 0) {
+            continue;
+        }
+        const field = (card, query) => {
+            const el = card.querySelector(query);
+            return el ? el.innerText.trim() : '';
+        };
+        return cards.slice(0, limit == null ? cards.length : limit).map(card => {
+            const link = card.querySelector('h3 a');
+            const text = [
+                link ? link.getAttribute('href') : '',
+                field(card, '.css-1yzry6v span.Text_text__T_hn_'),
+                field(card, '.css-4qqdjk'),
+                field(card, '.css-pvu419 span'),
+                field(card, 'h3 + span.Text_text__T_hn_'),
+            ].join('\\n');
+            let hash = 0x811c9dc5;
+            for (let i = 0; i < text.length; i++) {
+                hash ^= text.charCodeAt(i);
+                hash = Math.imul(hash, 0x01000193) >>> 0;
+            }
+            return hash.toString(16) + ':' + text.length;
+        });
+    }
+    return [];
+}
+"""
+
+# Upper bound on "load more" steps in crawl mode, in case the stop bounty never shows up
+MAX_CRAWL_STEPS = 50
+
+# How long to wait for more cards after scrolling before assuming the list ended
+LOAD_MORE_TIMEOUT_MS = 5000
+
+# Old fixed wait, only used when the bounty cards never show up
+FALLBACK_WAIT_MS = 8000
+
+# Resource types lean mode aborts, none of them are needed to render the bounty list
+LEAN_BLOCKED_TYPES = {'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'}
+
+# Analytics and tracking hosts lean mode aborts (subdomains included)
+TRACKING_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'segment.io',
+    'segment.com',
+    'amplitude.com',
+    'mixpanel.com',
+    'hotjar.com',
+    'fullstory.com',
+    'sentry.io',
+    'facebook.net',
+    'intercom.io',
+)
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+
+# JSON a server-rendered page embeds for its client, e.g. Next.js's __NEXT_DATA__
+JSON_SCRIPT_RE = re.compile(r'<script\b[^>]*\btype="application/json"[^>]*>(.*?)</script>', re.S | re.I)
+
+
+def browser_rss_mb() -> float:
+    """Resident memory of all child processes (Playwright driver + Chromium) in MB, 0.0 off Linux"""
+    try:
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        children = {}
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # Fields after the ")" closing the command name: state, ppid, ..., rss
+            fields = stat.rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append((int(pid), int(fields[21])))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+    total_pages = 0
+    stack = [os.getpid()]
+    while stack:
+        for pid, rss_pages in children.get(stack.pop(), []):
+            total_pages += rss_pages
+            stack.append(pid)
+    return total_pages * page_size / (1024 * 1024)
+
+
+def is_tracking_url(url: str) -> bool:
+    """Check whether a request goes to a known analytics/tracking host"""
+    host = urlparse(url).hostname or ''
+    return any(host == blocked or host.endswith('.' + blocked) for blocked in TRACKING_HOSTS)
+
+
+def build_bounty(title: str, price: str, description: str, author: str, link: Optional[str],
+                 time_info: str = "", status: str = "Unknown status", cycles: Union[str, int] = "0",
+                 deadline: Optional[str] = None) -> Bounty:
+    """Build a bounty from the extracted strings, the same whichever way the data was extracted"""
+    link = canonical_link(link)
+    description = description.strip()
+    price_cents = parse_price_cents(price, cycles)
+    return Bounty(
+        id=bounty_fingerprint(link, author, price_cents, description),
+        title=title.strip(),
+        description=description[:200] + "..." if len(description) > 200 else description,
+        author=author.strip(),
+        link=link,
+        price_cents=price_cents,
+        cycles=parse_cycles(cycles),
+        time_info=time_info.strip(),
+        status=status.strip(),
+        deadline=parse_deadline(deadline),
+    )
+
+
+def _looks_like_bounty(item: Any) -> bool:
+    if not isinstance(item, dict) or not item.get('title'):
+        return False
+    if item.get('__typename') == 'Bounty':
+        return True
+    return 'cycles' in item and ('slug' in item or 'url' in item)
+
+
+def bounty_from_api(item: Dict) -> Bounty:
+    """Build a bounty record from a bounty object in Replit's API responses"""
+    user = item.get('user') or {}
+    author = user.get('username') or item.get('authorUsername') or "Unknown author"
+    
+    link = item.get('url')
+    if not link and item.get('slug'):
+        link = f"/bounties/@{author}/{item['slug']}"
+    
+    cycles = item.get('cycles')
+    if isinstance(cycles, (int, float)):
+        cycles = round(cycles)
+        price = format_price(cycles * CENTS_PER_CYCLE)
+    else:
+        price = "Price not found"
+        cycles = str(cycles or "0")
+    
+    return build_bounty(
+        title=item['title'],
+        price=price,
+        description=item.get('descriptionPreview') or item.get('description') or "No description",
+        author=author,
+        link=link,
+        status=str(item.get('status') or "Unknown status"),
+        cycles=cycles,
+        deadline=item.get('deadline'),
+    )
+
+
+def bounties_from_payload(payload: Any) -> List[Bounty]:
+    """Find every bounty object in a JSON/GraphQL payload, in document order"""
+    bounties = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if _looks_like_bounty(node):
+                bounties.append(bounty_from_api(node))
+            else:
+                stack.extend(reversed(list(node.values())))
+    return bounties
+
+
+def payloads_from_html(html: str) -> List[Any]:
+    """Every JSON payload embedded in a page's application/json scripts"""
+    payloads = []
+    for match in JSON_SCRIPT_RE.finditer(html):
+        try:
+            payloads.append(json.loads(match.group(1)))
+        except ValueError:
+            continue
+    return payloads
+
+
+def usable_bounties(bounties: List[Bounty]) -> bool:
+    """Schema check for bounties read without a browser"""
+    # bounty_from_api fills in placeholders, a payload of another shape would pass on title and link alone
+    return bool(bounties) and all(
+        bounty.title and bounty.link and bounty.author and bounty.author != "Unknown author"
+        and bounty.price_cents is not None
+        for bounty in bounties
+    )
+
+
+class ReplitExtractor:
+    """Reads bounties off Replit's bounties page, from its cards or its GraphQL responses"""
+    name = 'replit'
+    hosts = ('replit.com',)
+    card_selectors = CARD_SELECTORS
+    ready_selector = READY_SELECTOR
+    cards_js = EXTRACT_CARDS_JS
+    card_hashes_js = CARD_HASHES_JS
+    
+    def from_payload(self, payload: Any) -> List[Bounty]:
+        return bounties_from_payload(payload)
+    
+    def from_html(self, html: str) -> List[Bounty]:
+        """Bounties from the data a server-rendered page embeds (no JavaScript run)"""
+        return [bounty for payload in payloads_from_html(html) for bounty in self.from_payload(payload)]
+    
+    def from_card(self, card: Dict) -> Bounty:
+        return build_bounty(
+            title=card['title'] or "No title",
+            price=card['price'] or "Price not found",
+            description=card['description'] or "No description",
+            author=card['author'] or "Unknown author",
+            link=card['link'],
+            time_info=card['time_info'] or "",
+            status=card['status'] or "Unknown status",
+            cycles=card['cycles'] or "0",
+        )
+
+
+# Extractor per bounty board, by name
+EXTRACTORS = {extractor.name: extractor for extractor in (ReplitExtractor(),)}
+
+# Used for hosts no extractor claims, e.g. local replay fixtures
+DEFAULT_EXTRACTOR = 'replit'
+
+
+def extractor_for(url: str):
+    """Pick the extractor for a bounty page by its host"""
+    host = urlparse(url).hostname or ''
+    for extractor in EXTRACTORS.values():
+        if any(host == known or host.endswith('.' + known) for known in extractor.hosts):
+            return extractor
+    return EXTRACTORS[DEFAULT_EXTRACTOR]
+
+
+class Source:
+    """One bounty list to watch: a board, or one sort order or search query of it"""
+    
+    def __init__(self, name: str, url: str, extractor: Optional[str] = None, limit: Optional[int] = 15):
+        self.name = name
+        self.url = url
+        self.extractor = EXTRACTORS[extractor] if extractor else extractor_for(url)
+        self.limit = limit
+        # Durations of the cycle-wide phases (launch, dedup, db_write, ...) in milliseconds
+        self.timings: Dict[str, float] = {}
+        # Signature (digest + per-card hashes) of the list as last stored, and of the last scrape
+        self.signature: Optional[Dict] = None
+        self.current_signature: Optional[Dict] = None
+        self.unchanged = False
+        # Outcome of the last scrape: page status, Retry-After seconds on a 429, and whether it failed
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.failed = False
+        # Bytes the browser transferred loading the page, and for a normal (not lean) load as last stored
+        self.page_bytes = 0
+        self.baseline_bytes: Optional[int] = None
+    
+    @property
+    def state_key(self) -> str:
+        return f"list_signature:{self.url}"
+    
+    @property
+    def bytes_key(self) -> str:
+        return f"page_bytes:{self.url}"
+
+
+def parse_source(spec: str) -> Source:
+    """Parse a NAME=URL source spec"""
+    name, _, url = spec.partition('=')
+    if not name or not url.startswith(('http://', 'https://')):
+        raise argparse.ArgumentTypeError(f"expected NAME=URL, got {spec!r}")
+    return Source(name, url)
 
-load_dotenv()  # Load environment variables from .env file
 
 class BountyScraper:
-    def __init__(self, telegram_bot_token: str, telegram_chat_id: str):
+    def __init__(self, telegram_bot_token: str, telegram_chat_id: str, use_api: bool = True,
+                 crawl: bool = False, digest: bool = False, digest_max_items: int = 50,
+                 digest_max_delay: float = 0, bounties_url: str = BOUNTIES_URL, lean: bool = False,
+                 change_detection: bool = True, sources: Optional[List[Source]] = None, max_pages: int = 3,
+                 email: Optional[EmailNotifier] = None, email_recipient: Optional[str] = None,
+                 http: bool = False):
         self.telegram_bot_token = telegram_bot_token
         self.telegram_chat_id = telegram_chat_id
+        # Optional email channel, `email_recipient` gets every new bounty in one email per batch
+        self.email = email
+        self.email_recipient = email_recipient if email else None
+        # Bounty lists scraped each cycle, at most `max_pages` pages open at once
+        self.sources = sources or [Source('replit', bounties_url)]
+        self.max_pages = max_pages
+        # Read bounties from the page's own API responses, falling back to the DOM
+        self.use_api = use_api
+        # Abort images, fonts, media, stylesheets and trackers while loading the page
+        self.lean = lean
+        # Fetch the pages with plain HTTP requests, the browser is only launched for sources that fail
+        self.http = http
+        self.http_session = None
+        # Leave a browser launched for a scrape running afterwards (daemon mode keeps it warm)
+        self.keep_browser = False
+        # Blocked requests (by type) and bytes downloaded during the last cycle
+        self.page_stats: Dict[str, Any] = {'blocked': {}, 'bytes': 0}
+        # Skip extraction when a list looks the same as on the last poll
+        self.change_detection = change_detection
+        # Scroll through the list until the newest stored bounty instead of reading the first page
+        self.crawl = crawl
         self.db = Database()
+        self.notifier = TelegramNotifier(telegram_bot_token)
+        self.metrics = Metrics()
+        # Notifications are queued in the database with the bounties and sent from there,
+        # optionally coalesced into a few digest messages per chat instead of one message each
+        self.outbox = OutboxWorker(
+            self.db, self.notifier, self.format_bounty_message, self.format_digest_entry,
+            digest=digest, digest_max_items=digest_max_items, digest_max_delay=digest_max_delay,
+            email=email, format_email=self.format_email_digest, metrics=self.metrics
+        )
+        # New bounties found by the last cycle
+        self.new_count = 0
+        # Subscribers' rules, reloaded from the database before each round of notifications
+        self.subscriptions = SubscriptionIndex([])
+        # Warm browser shared across scrape cycles in daemon mode
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        # Per-phase durations of the last scrape in milliseconds
+        self.timings: Dict[str, float] = {}
+        self.metrics.track('notifications_sent_total', lambda: self.notifier.sent)
+        self.metrics.track('notify_failures_total', lambda: self.notifier.failed)
+        if email:
+            self.metrics.track('emails_sent_total', lambda: email.sent)
+            self.metrics.track('email_failures_total', lambda: email.failed)
+        self.metrics.track('browser_rss_bytes', lambda: browser_rss_mb() * 1024 * 1024)
         
-    def format_datetime(self, dt_str: str) -> str:
-        """Format datetime string to a readable format"""
-        dt = datetime.fromisoformat(dt_str)
+    def format_datetime(self, dt: datetime) -> str:
+        """Format a datetime in a readable format"""
         return dt.strftime("%B %d, %Y at %I:%M %p")  # e.g., "March 14, 2024 at 02:30 PM"
     
-    async def scrape_bounties(self, limit: int = 15) -> List[Dict]:
-        """Scrape bounties from Replit bounties page"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-gpu',
-                    '--disable-software-rasterizer',
-                ]
-            )
-            
-            context = await browser.new_context(
-                user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-                viewport={'width': 1920, 'height': 1080}
+    @contextmanager
+    def timed(self, phase: str, source: Optional[Source] = None):
+        """Record how long the block takes in the timings (ms) of `source` or the cycle, and the phase histogram"""
+        timings = source.timings if source is not None else self.timings
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            timings[phase] = elapsed * 1000
+            self.metrics.observe('phase_seconds', elapsed, phase=phase)
+    
+    async def start_browser(self):
+        """Launch Chromium and open a browser context that can be reused across scrapes"""
+        # Imported here so commands that never open a browser start faster
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        self.context = await self.browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={'width': 1920, 'height': 1080}
+        )
+        if self.lean:
+            await self.context.route("**/*", self._route_lean)
+        print("🌐 Browser launched")
+    
+    async def _route_lean(self, route):
+        """Abort requests the bounty list doesn't need, let the rest through"""
+        request = route.request
+        if request.resource_type in LEAN_BLOCKED_TYPES:
+            kind = request.resource_type
+        elif request.resource_type != 'document' and is_tracking_url(request.url):
+            kind = 'tracking'
+        else:
+            await route.continue_()
+            return
+        
+        blocked = self.page_stats['blocked']
+        blocked[kind] = blocked.get(kind, 0) + 1
+        self.metrics.inc('requests_blocked_total', type=kind)
+        await route.abort()
+    
+    async def _count_request_bytes(self, request, source: Source):
+        # What actually went over the wire, Content-Length is missing on chunked responses
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        transferred = max(sizes['responseHeadersSize'], 0) + max(sizes['responseBodySize'], 0)
+        source.page_bytes += transferred
+        self.page_stats['bytes'] += transferred
+        self.metrics.inc('page_bytes_total', transferred)
+    
+    async def close_browser(self):
+        """Close the browser context, Chromium and the Playwright driver"""
+        for closer in (
+            self.context.close if self.context else None,
+            self.browser.close if self.browser else None,
+            self.playwright.stop if self.playwright else None,
+        ):
+            if closer is None:
+                continue
+            try:
+                await closer()
+            except Exception as e:
+                # A crashed browser can't be closed cleanly, just drop it
+                print(f"Warning: Error while closing browser: {e}")
+        self.playwright = None
+        self.browser = None
+        self.context = None
+    
+    def browser_alive(self) -> bool:
+        """Check whether the warm browser is still connected"""
+        return self.browser is not None and self.browser.is_connected()
+    
+    async def scrape_sources(self, crawl: bool = False) -> List[Bounty]:
+        """Scrape every source concurrently in the shared browser, each bounty returned once"""
+        self.timings = {}
+        self.page_stats = {'blocked': {}, 'bytes': 0}
+        results: List[Optional[List[Bounty]]] = [None] * len(self.sources)
+        if self.http and not crawl:
+            results = list(await asyncio.gather(*(
+                self.scrape_http(limit=source.limit, source=source) for source in self.sources
+            )))
+        # Sources HTTP mode couldn't read (or all of them) go through the browser
+        browser_sources = [i for i, found in enumerate(results) if found is None]
+        
+        owns_browser = bool(browser_sources) and not self.browser_alive()
+        if owns_browser:
+            with self.timed('launch'):
+                await self.start_browser()
+        
+        page_slots = asyncio.Semaphore(self.max_pages)
+        
+        async def scrape(source: Source) -> List[Bounty]:
+            async with page_slots:
+                return await self.scrape_bounties(limit=source.limit, crawl=crawl, source=source)
+        
+        try:
+            found = await asyncio.gather(*(scrape(self.sources[i]) for i in browser_sources))
+            for i, bounties in zip(browser_sources, found):
+                results[i] = bounties
+        finally:
+            self._report_page_stats()
+            if owns_browser and not self.keep_browser:
+                await self.close_browser()
+        
+        # A bounty can show up in several sources (e.g. a search and the newest list)
+        seen = set()
+        bounties = []
+        for source, found in zip(self.sources, results):
+            if len(self.sources) > 1:
+                print(f"📚 {source.name}: {len(found)} bounties")
+            for bounty in found:
+                if bounty.id not in seen:
+                    seen.add(bounty.id)
+                    bounties.append(bounty)
+        return bounties
+    
+    async def scrape_http(self, limit: Optional[int] = 15, source: Optional[Source] = None) -> Optional[List[Bounty]]:
+        """Scrape bounties from one source without a browser, None if it needs one"""
+        import aiohttp
+        source = source or self.sources[0]
+        source.timings = {}
+        source.current_signature = None
+        source.unchanged = False
+        source.status = None
+        source.retry_after = None
+        source.failed = False
+        source.page_bytes = 0
+        
+        try:
+            with self.timed('navigation', source):
+                session = await self._http_session()
+                async with session.get(source.url) as response:
+                    source.status = response.status
+                    body = await response.read()
+                    content_type = response.headers.get('content-type') or ''
+                    retry_after = response.headers.get('retry-after')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ HTTP request for {source.name} failed: {e}")
+            return self._http_fallback(source)
+        
+        self.page_stats['bytes'] += len(body)
+        self.metrics.inc('page_bytes_total', len(body))
+        if source.status == 429:
+            # The browser would be turned away too
+            source.retry_after = parse_retry_after(retry_after)
+            source.failed = True
+            print(f"🚦 Rate limited by {source.name}")
+            return []
+        if source.status != 200:
+            print(f"⚠️ HTTP request for {source.name} returned status {source.status}")
+            return self._http_fallback(source)
+        
+        with self.timed('extraction', source):
+            text = body.decode('utf-8', errors='replace')
+            if 'json' in content_type:
+                try:
+                    bounties = source.extractor.from_payload(json.loads(text))
+                except ValueError:
+                    bounties = []
+            else:
+                bounties = source.extractor.from_html(text)
+            bounties = self._dedupe_by_link(bounties)[:limit]
+        if not usable_bounties(bounties):
+            print(f"⚠️ No usable bounty data in the HTTP response for {source.name}")
+            return self._http_fallback(source)
+        print(f"🌐 Read {len(bounties)} bounties for {source.name} over HTTP")
+        self.metrics.inc('http_scrapes_total')
+        
+        if self.change_detection:
+            source.current_signature = await self._list_signature(None, bounties, limit, source.extractor)
+            changed = self._changed_cards(source.current_signature, source)
+            if changed is not None:
+                source.unchanged = not changed
+                bounties = [bounties[i] for i in changed]
+        return bounties
+    
+    def _http_fallback(self, source: Source) -> None:
+        """Count a source HTTP mode couldn't read, the None tells scrape_sources to use the browser"""
+        print(f"↩️ Using the browser for {source.name}")
+        self.metrics.inc('http_fallbacks_total')
+    
+    async def _http_session(self):
+        """The pooled HTTP session HTTP mode fetches pages with, opened on first use"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = create_http_session(
+                headers={'User-Agent': USER_AGENT, 'Accept': 'text/html,application/json'}
             )
+        return self.http_session
+    
+    async def close_http(self):
+        """Close HTTP mode's session"""
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+    
+    async def scrape_bounties(self, limit: Optional[int] = 15, crawl: bool = False,
+                              source: Optional[Source] = None) -> List[Bounty]:
+        """Scrape bounties from one source's page (the first source by default)"""
+        source = source or self.sources[0]
+        extractor = source.extractor
+        source.timings = {}
+        source.current_signature = None
+        source.unchanged = False
+        source.status = None
+        source.retry_after = None
+        source.failed = False
+        source.page_bytes = 0
+        # The daemon's warm browser if one is running, otherwise one just for this call
+        owns_browser = not self.browser_alive()
+        if owns_browser:
+            with self.timed('launch', source):
+                await self.start_browser()
+        
+        page = None
+        transfers = []
+        try:
+            page = await self.context.new_page()
+            page.on("requestfinished", lambda request: transfers.append(
+                asyncio.ensure_future(self._count_request_bytes(request, source))
+            ))
             
-            page = await context.new_page()
+            captured: List[Bounty] = []
+            api_ready = asyncio.Event()
+            pending = []
+            if self.use_api:
+                page.on("response", lambda response: pending.append(
+                    asyncio.ensure_future(self._capture_api_response(response, captured, api_ready, extractor))
+                ))
             
-            try:
-                print("Navigating to bounties page...")
-                # Wait for network idle and longer timeout
+            print(f"Navigating to {source.name} bounties page...")
+            # Don't wait for network idle, analytics beacons keep pushing it back
+            with self.timed('navigation', source):
                 response = await page.goto(
-                    "https://replit.com/bounties?order=creationDateDescending",
-                    wait_until="networkidle",
+                    source.url,
+                    wait_until="domcontentloaded",
                     timeout=30000
                 )
-                print(f"Page loaded with status: {response.status}")
+            print(f"Page loaded with status: {response.status}")
+            source.status = response.status
+            if response.status == 429:
+                source.retry_after = parse_retry_after(response.headers.get('retry-after'))
+                source.failed = True
+                print(f"🚦 Rate limited by {source.name}")
+                return []
+            
+            print("Waiting for bounty list to render...")
+            with self.timed('readiness', source):
+                dom_ready = asyncio.ensure_future(self.wait_for_bounty_list(page, selector=extractor.ready_selector))
+                waiters = {dom_ready}
+                if self.use_api:
+                    waiters.add(asyncio.ensure_future(api_ready.wait()))
+                done, not_done = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in not_done:
+                    waiter.cancel()
                 
-                # Wait for key elements that indicate JS has loaded
-                print("Waiting for JavaScript content to load...")
-                try:
-                    # Wait for the search input to be present
-                    await page.wait_for_selector('input[placeholder="Search for a Bounty"]', timeout=30000)
-                    print("Found search input")
-                except Exception as e:
-                    print(f"Warning: Could not find search input: {e}")
+                if dom_ready in done and not dom_ready.result() and not api_ready.is_set():
+                    # Additional wait for dynamic content
+                    await page.wait_for_timeout(FALLBACK_WAIT_MS)
+            print(f"⏱️ Bounty list ready after {source.timings['readiness']:.0f} ms")
+            
+            changed = None
+            # API bounties as of the signature, so the changed positions index the same list
+            api_bounties: List[Bounty] = []
+            signed = self.change_detection and not crawl
+            if signed:
+                with self.timed('change_detection', source):
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    api_bounties = self._dedupe_by_link(captured)[:limit]
+                    source.current_signature = await self._list_signature(page, api_bounties, limit, extractor)
+                changed = self._changed_cards(source.current_signature, source)
+                if changed is not None and not changed:
+                    source.unchanged = True
+                    return []
+            
+            with self.timed('extraction', source):
+                if crawl:
+                    # Everything above the first stored bounty, `limit` doesn't apply
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    return await self._crawl(page, captured, pending, source)
+                if not signed:
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    api_bounties = self._dedupe_by_link(captured)[:limit]
                 
-                # Additional wait for dynamic content
-                await page.wait_for_timeout(8000)
+                if api_bounties:
+                    print(f"Using {len(api_bounties)} bounties from API responses")
+                    self.metrics.inc('api_extractions_total')
+                    if changed is not None:
+                        return [api_bounties[i] for i in changed]
+                    return api_bounties
                 
                 # # Take screenshot of current state
                 # await page.screenshot(path='1_after_load.png')
                 
                 print("Looking for bounty cards...")
-                # Try multiple selectors in order of specificity
-                selectors = [
-                    '.Surface_surfaceRoot__TeA2u.css-r1hogs',
-                    'li[class*="Surface_surfaceRoot"]',
-                    'li[class*="useView_view"]',
-                    'li'
-                ]
-                
-                bounty_cards = []
-                for selector in selectors:
-                    bounty_cards = await page.query_selector_all(selector)
-                    print(f"Trying selector '{selector}': found {len(bounty_cards)} elements")
-                    if len(bounty_cards) > 0:
-                        print(f"Using selector: {selector}")
-                        break
-                
-                # Save page state for debugging
-                page_content = await page.content()
-                # with open('page_content.html', 'w', encoding='utf-8') as f:
-                #     f.write(page_content)
-                
-                bounties = []
-                for i, card in enumerate(bounty_cards[:limit]):
-                    if i >= limit:
-                        break
-                    
-                    bounty = await self._extract_bounty_data(card)
-                    if bounty:
-                        bounties.append(bounty)
-                
-                return bounties
-                
-            except Exception as e:
-                print(f"Error scraping bounties: {e}")
-                try:
+                return await self._extract_bounties(page, limit=limit, indices=changed, source=source)
+            
+        except Exception as e:
+            source.failed = True
+            # Cards that were never extracted must not be remembered as seen
+            source.current_signature = None
+            print(f"Error scraping bounties: {e}")
+            try:
+                if page:
                     await page.screenshot(path='error_screenshot.png')
                     print("Error screenshot saved as error_screenshot.png")
-                except:
-                    print("Failed to save error screenshot")
-                return []
-            finally:
-                await context.close()
-                await browser.close()
+            except:
+                print("Failed to save error screenshot")
+            return []
+        finally:
+            await asyncio.gather(*transfers, return_exceptions=True)
+            if owns_browser:
+                await self.close_browser()
+            elif page:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+    
+    def _report_page_stats(self):
+        blocked = self.page_stats['blocked']
+        if self.lean:
+            details = ", ".join(f"{count} {kind}" for kind, count in sorted(blocked.items())) or "nothing"
+            print(f"🪶 Lean mode blocked {sum(blocked.values())} requests ({details}), "
+                  f"downloaded {self.page_stats['bytes'] / 1024:.0f} KB")
     
-    async def _extract_bounty_data(self, card) -> Optional[Dict]:
-        """Extract bounty data from a card element"""
+    async def _report_bytes_saved(self):
+        """Compare lean loads with the last normal load of each page, normal loads update that baseline"""
+        saved = 0
+        compared = False
+        for source in self.sources:
+            # Failed loads and HTTP mode's requests don't load the whole page
+            if source.failed or not source.page_bytes:
+                continue
+            if source.baseline_bytes is None:
+                stored = await self.db.get_state(source.bytes_key)
+                source.baseline_bytes = int(stored) if stored else 0
+            if self.lean:
+                if source.baseline_bytes:
+                    saved += max(source.baseline_bytes - source.page_bytes, 0)
+                    compared = True
+            # Only rewritten when the page grew or shrank noticeably, not on every poll
+            elif abs(source.page_bytes - source.baseline_bytes) > source.baseline_bytes / 10:
+                await self.db.set_state(source.bytes_key, str(source.page_bytes))
+                source.baseline_bytes = source.page_bytes
+        if compared:
+            self.metrics.inc('page_bytes_saved_total', saved)
+            print(f"🪶 Lean mode saved {saved / 1024:.0f} KB compared with a normal page load")
+    
+    async def _capture_api_response(self, response, captured: List[Bounty], api_ready: asyncio.Event,
+                                    extractor: ReplitExtractor):
+        """Collect bounties from the JSON responses the bounties page fetches"""
         try:
-            # Title is in an h3 element with a link
-            title_elem = await card.query_selector('h3 a')
-            title = await title_elem.inner_text() if title_elem else "No title"
-            
-            # Price is in the first span with css-4qqdjk class
-            price_elem = await card.query_selector('.css-4qqdjk')
-            price = await price_elem.inner_text() if price_elem else "Price not found"
-            
-            # Description is in a span after the h3
-            desc_elem = await card.query_selector('h3 + span.Text_text__T_hn_')
-            description = await desc_elem.inner_text() if desc_elem else "No description"
-            
-            # Link is in the h3 a element
-            link_elem = await card.query_selector('h3 a')
-            link = await link_elem.get_attribute('href') if link_elem else None
-            if link and not link.startswith('http'):
-                link = f"https://replit.com{link}"
+            if response.request.resource_type not in ('xhr', 'fetch'):
+                return
+            if 'json' not in (response.headers.get('content-type') or ''):
+                return
+            payload = await response.json()
+        except Exception:
+            # Body unavailable (redirect, page closed) or not actually JSON
+            return
+        
+        bounties = extractor.from_payload(payload)
+        if bounties:
+            captured.extend(bounties)
+            api_ready.set()
+    
+    def _dedupe_by_link(self, bounties: List[Bounty]) -> List[Bounty]:
+        """Drop repeated bounties (e.g. the same item in several responses), keeping order"""
+        seen = set()
+        unique = []
+        for bounty in bounties:
+            key = bounty.link or bounty.title
+            if key not in seen:
+                seen.add(key)
+                unique.append(bounty)
+        return unique
+    
+    async def wait_for_bounty_list(self, page, timeout: int = 30000, settle_ms: int = 300,
+                                   stable_windows: int = 2, selector: str = READY_SELECTOR) -> bool:
+        """Wait until bounty cards are rendered and their count stops changing, False if none appeared"""
+        try:
+            await page.wait_for_selector(selector, timeout=timeout)
+        except Exception as e:
+            print(f"Warning: Bounty cards did not appear: {e}")
+            return False
+        
+        cards = page.locator(selector)
+        deadline = time.perf_counter() + timeout / 1000
+        last_count = await cards.count()
+        stable = 0
+        while stable < stable_windows and time.perf_counter() < deadline:
+            await page.wait_for_timeout(settle_ms)
+            count = await cards.count()
+            if count == last_count:
+                stable += 1
+            else:
+                stable = 0
+                last_count = count
+        return True
+    
+    async def _crawl(self, page, captured: List[Bounty], pending: List, source: Source) -> List[Bounty]:
+        """Walk down the bounty list until a stored bounty shows up or the list ends"""
+        from_api = bool(captured)
+        if from_api:
+            self.metrics.inc('api_extractions_total')
+        collected: List[Bounty] = []
+        
+        for step in range(MAX_CRAWL_STEPS):
+            if from_api:
+                await asyncio.gather(*pending, return_exceptions=True)
+                fresh = self._dedupe_by_link(captured)[len(collected):]
+            else:
+                fresh = await self._extract_bounties(page, offset=len(collected), source=source)
             
-            # Author is in the link with css-1yzry6v class
-            author_elem = await card.query_selector('.css-1yzry6v span.Text_text__T_hn_')
-            author = await author_elem.inner_text() if author_elem else "Unknown author"
-
-            # Get additional data like time remaining and status
-            time_elem = await card.query_selector('.css-149xez1 span')
-            time_info = await time_elem.inner_text() if time_elem else ""
-
-            status_elem = await card.query_selector('.Surface_surfaceDefault__TcNI5 span')
-            status = await status_elem.inner_text() if status_elem else "Unknown status"
-
-            # Get cycles amount if available
-            cycles_elem = await card.query_selector('.css-pvu419 span')
-            cycles = await cycles_elem.inner_text() if cycles_elem else "0"
+            new_ids = await self.db.get_new_ids([bounty.id for bounty in fresh])
+            for bounty in fresh:
+                if bounty.id not in new_ids:
+                    print(f"Reached a known bounty after {step + 1} page(s), {len(collected)} new")
+                    return collected
+                collected.append(bounty)
             
-            return {
-                'title': title.strip(),
-                'price': price.strip(),
-                'description': description.strip()[:200] + "..." if len(description.strip()) > 200 else description.strip(),
-                'author': author.strip(),
-                'link': link,
-                'time_info': time_info.strip(),
-                'status': status.strip(),
-                'cycles': cycles.strip(),
-                'scraped_at': datetime.now().isoformat(),
-                'id': hash(f"{title}{price}{author}")  # Simple ID generation
-            }
-        except Exception as e:
-            print(f"Error extracting bounty data: {e}")
+            if not await self._load_more(page, source.extractor.ready_selector):
+                print(f"Reached the end of the bounty list, {len(collected)} new")
+                return collected
+        
+        print(f"Warning: Stopped crawling after {MAX_CRAWL_STEPS} pages without reaching a known bounty")
+        return collected
+    
+    async def _load_more(self, page, selector: str = READY_SELECTOR) -> bool:
+        """Scroll (or click "load more") to get the next batch of cards, False at the end of the list"""
+        cards = page.locator(selector)
+        count = await cards.count()
+        
+        load_more = page.get_by_role("button", name=re.compile(r"(load|show) more", re.I))
+        if await load_more.count() > 0 and await load_more.first.is_visible():
+            await load_more.first.click()
+        else:
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        
+        try:
+            await page.wait_for_function(
+                "([selector, count]) => document.querySelectorAll(selector).length > count",
+                arg=[selector, count],
+                timeout=LOAD_MORE_TIMEOUT_MS
+            )
+        except Exception:
+            return False
+        return True
+    
+    async def _list_signature(self, page, captured: List[Bounty], limit: Optional[int],
+                              extractor: ReplitExtractor) -> Dict:
+        """Digest of the bounty list plus one hash per card, in page order"""
+        if captured:
+            # The same fields as the card hashes, the link ID alone doesn't change when a bounty is edited
+            cards = [
+                hashlib.blake2b('\n'.join(
+                    map(str, (bounty.link, bounty.author, bounty.price_cents, bounty.cycles, bounty.description))
+                ).encode('utf-8'), digest_size=8).hexdigest()
+                for bounty in self._dedupe_by_link(captured)[:limit]
+            ]
+        else:
+            cards = await page.evaluate(
+                extractor.card_hashes_js, {'selectors': extractor.card_selectors, 'limit': limit}
+            )
+        digest = hashlib.blake2b('\n'.join(cards).encode('utf-8'), digest_size=16).hexdigest()
+        return {'digest': digest, 'cards': cards}
+    
+    def _changed_cards(self, signature: Dict, source: Source) -> Optional[List[int]]:
+        """Positions of the cards that weren't in the source's stored list, None if there's nothing to compare"""
+        if not source.signature:
             return None
+        if signature['digest'] == source.signature['digest']:
+            return []
+        known = set(source.signature['cards'])
+        return [i for i, card in enumerate(signature['cards']) if card not in known]
+    
+    async def _load_signatures(self):
+        """Load the stored list signature of every source that doesn't have one in memory"""
+        for source in self.sources:
+            if source.signature is None:
+                stored = await self.db.get_state(source.state_key)
+                source.signature = json.loads(stored) if stored else {}
+    
+    async def _store_signatures(self):
+        """Remember the current list signatures for the next poll (in memory and in the database)"""
+        for source in self.sources:
+            if source.failed or not source.current_signature or source.current_signature == source.signature:
+                continue
+            await self.db.set_state(source.state_key, json.dumps(source.current_signature))
+            source.signature = source.current_signature
+    
+    async def _extract_bounties(self, page, offset: int = 0, limit: Optional[int] = None,
+                                indices: Optional[List[int]] = None, source: Optional[Source] = None) -> List[Bounty]:
+        """Extract the cards at `indices`, or `limit` cards from `offset`, in a single evaluate call"""
+        extractor = (source or self.sources[0]).extractor
+        result = await page.evaluate(
+            extractor.cards_js,
+            {'selectors': extractor.card_selectors, 'offset': offset, 'limit': limit, 'indices': indices}
+        )
+        if result['selector'] != extractor.card_selectors[0]:
+            self.metrics.inc('selector_fallbacks_total')
+        if not result['selector']:
+            print("No bounty cards found with any selector")
+            return []
+        print(f"Using selector '{result['selector']}': extracted {len(result['cards'])} cards")
+        
+        bounties = []
+        for card in result['cards']:
+            try:
+                bounties.append(extractor.from_card(card))
+            except Exception as e:
+                print(f"Error extracting bounty data: {e}")
+        return bounties
     
-    async def load_previous_bounties(self) -> List[Dict]:
+    async def load_previous_bounties(self) -> List[Bounty]:
         """Load previously scraped bounties from database"""
         return await self.db.get_previous_bounties()
     
-    async def save_bounties(self, bounties: List[Dict]):
+    async def save_bounties(self, bounties: List[Bounty]):
         """Save bounties to database"""
         await self.db.save_bounties(bounties)
     
-    def is_bounty_duplicate(self, bounty: Dict, previous_bounties: List[Dict]) -> bool:
-        """Check if a bounty already exists by comparing key fields"""
-        for prev_bounty in previous_bounties:
-            if (bounty['author'] == prev_bounty['author'] and
-                bounty['price'] == prev_bounty['price'] and
-                bounty['link'] == prev_bounty['link'] and
-                bounty['description'] == prev_bounty['description']):
-                return True
-        return False
+    def find_new_bounties(self, current_bounties: List[Bounty], previous_bounties: List[Bounty]) -> List[Bounty]:
+        """Find bounties that don't exist in previous bounties (a set lookup on the stable IDs)"""
+        seen_ids = {bounty.id for bounty in previous_bounties}
+        return [bounty for bounty in current_bounties if bounty.id not in seen_ids]
     
-    def find_new_bounties(self, current_bounties: List[Dict], previous_bounties: List[Dict]) -> List[Dict]:
-        """Find bounties that don't exist in previous bounties by comparing content"""
-        new_bounties = []
-        for bounty in current_bounties:
-            if not self.is_bounty_duplicate(bounty, previous_bounties):
-                new_bounties.append(bounty)
-        return new_bounties
-    
-    def send_telegram_notification(self, bounty: Dict):
-        """Send a single bounty notification to Telegram"""
-        formatted_time = self.format_datetime(bounty['scraped_at'])
+    def format_bounty_message(self, bounty: Bounty) -> str:
+        """Format a bounty as a Telegram message"""
+        formatted_time = self.format_datetime(bounty.scraped_at)
         
-        message = f"""🎯 **New Replit Bounty!**
+        return f"""🎯 **New Replit Bounty!**
 
-**Title:** {bounty['title']}
-**Price:** {bounty['price']}
-**Author:** {bounty['author']}
-**Description:** {bounty['description']}
-**Link:** {bounty['link'] or 'No link available'}
+**Title:** {escape_markdown(bounty.title)}
+**Price:** {escape_markdown(bounty.price)}
+**Author:** {escape_markdown(bounty.author)}
+**Description:** {escape_markdown(bounty.description)}
+**Link:** {escape_markdown(bounty.link or 'No link available')}
 **Posted:** {formatted_time}
 
 ---"""
-        
-        url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-        data = {
-            'chat_id': self.telegram_chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
+    
+    def format_digest_entry(self, bounty: Bounty) -> str:
+        """Format a bounty as a compact entry of a digest message"""
+        title = bounty.title if len(bounty.title) <= 200 else bounty.title[:200] + "..."
+        # User text stays outside bold/italic: legacy Markdown can't escape inside an entity
+        entry = f"• {escape_markdown(title)} · {escape_markdown(bounty.price)} · by {escape_markdown(bounty.author)}"
+        if bounty.description:
+            entry += f"\n{escape_markdown(bounty.description)}"
+        if bounty.link:
+            entry += f"\n{escape_markdown(bounty.link)}"
+        return entry
+    
+    def format_email_digest(self, bounties: List[Bounty]) -> Tuple[str, str]:
+        """Format bounties as the subject and plain text body of one email"""
+        subject = f"{len(bounties)} new Replit bount{'y' if len(bounties) == 1 else 'ies'}"
+        entries = []
+        for bounty in bounties:
+            entry = f"{bounty.title}\n{bounty.price} · by {bounty.author}"
+            if bounty.description:
+                entry += f"\n{bounty.description}"
+            entry += f"\n{bounty.link or 'No link available'}"
+            entries.append(entry)
+        return subject, "\n\n".join(entries) + "\n"
+    
+    async def send_telegram_notification(self, bounty: Bounty) -> bool:
+        """Send a single bounty notification to Telegram"""
+        sent = await self.notifier.send_message(self.telegram_chat_id, self.format_bounty_message(bounty))
+        if sent:
+            print(f"📢 Sent notification for: {bounty.title}")
+        return sent
+    
+    async def run_cycle(self):
+        """Scrape once, store the results and notify about new bounties (the database must be connected)"""
+        self.metrics.inc('runs_total')
         try:
-            response = requests.post(url, data=data)
-            if response.status_code == 200:
-                print(f"📢 Sent notification for: {bounty['title']}")
+            await self._run_cycle()
+            if self.outbox.running:
+                self.outbox.wake()
             else:
-                print(f"❌ Failed to send notification: {response.text}")
-        except Exception as e:
-            print(f"❌ Error sending notification: {e}")
+                with self.timed('notify'):
+                    await self.send_notifications()
+        except Exception:
+            self.metrics.inc('run_failures_total')
+            raise
+        finally:
+            self.metrics.set('last_run_timestamp_seconds', time.time())
     
-    async def run(self):
-        """Main execution method"""
-        print("🔍 Starting bounty scraper...")
-        
-        # Connect to database
-        await self.db.connect()
-        
-        try:
-            # First load previous bounties
-            previous_bounties = await self.db.get_previous_bounties()
-            print(f"📚 Loaded {len(previous_bounties)} previous bounties")
+    def _record_scrape_metrics(self, bounties: List[Bounty]):
+        # Extraction time is in phase_seconds, per card it's that over cards_found_total
+        self.metrics.inc('cards_found_total', len(bounties))
+    
+    async def _run_cycle(self):
+        self.new_count = 0
+        # Scrape current bounties
+        if self.crawl and await self.db.has_bounties():
+            # Only fetch bounties posted since the last run
+            current_bounties = await self.scrape_sources(crawl=True)
+            self._record_scrape_metrics(current_bounties)
+            print(f"🔍 Found {len(current_bounties)} bounties since the last run")
+            if not current_bounties:
+                print("✅ No new bounties, skipping...")
+                return
+            sorted_bounties = current_bounties
+        else:
+            if self.change_detection:
+                await self._load_signatures()
             
-            # Then scrape current bounties
-            current_bounties = await self.scrape_bounties()
+            current_bounties = await self.scrape_sources()
+            await self._report_bytes_saved()
+            if all(source.unchanged for source in self.sources):
+                print("💤 Bounty lists unchanged since the last poll, skipping...")
+                self.metrics.inc('unchanged_polls_total')
+                return
+            self._record_scrape_metrics(current_bounties)
             print(f"🔍 Found {len(current_bounties)} current bounties")
             
             if not current_bounties:
+                # Cards were only reordered or removed
+                await self._store_signatures()
                 print("❌ No bounties found, skipping...")
                 return
             
             # Sort current bounties by scraped_at
-            sorted_bounties = sorted(
-                current_bounties,
-                key=lambda x: datetime.fromisoformat(x['scraped_at']),
-                reverse=True
-            )[:10]  # Keep only latest 10
-            
-            # Find truly new bounties by comparing content
-            new_bounties = self.find_new_bounties(sorted_bounties, previous_bounties)
-            print(f"🆕 Found {len(new_bounties)} new bounties")
-            
-            # First save all current bounties to database
-            await self.db.save_bounties(sorted_bounties)
-            print("💾 Saved latest bounties to database")
-            
-            # Then send notifications for new bounties
-            for bounty in new_bounties:
-                self.send_telegram_notification(bounty)
-            
+            sorted_bounties = sorted(current_bounties, key=lambda bounty: bounty.scraped_at, reverse=True)
+        
+        # Find truly new bounties, the database does the comparison
+        with self.timed('dedup'):
+            new_ids = await self.db.get_new_ids([bounty.id for bounty in sorted_bounties])
+        new_bounties = [bounty for bounty in sorted_bounties if bounty.id in new_ids]
+        self.new_count = len(new_bounties)
+        self.metrics.inc('new_bounties_total', len(new_bounties))
+        print(f"🆕 Found {len(new_bounties)} new bounties")
+        
+        if new_bounties:
+            self.subscriptions = await load_index(self.db)
+        notifications = [
+            (chat_id, bounty)
+            for chat_id, bounties in self.route(new_bounties).items()
+            for bounty in bounties
+        ]
+        
+        # Save all current bounties and queue their notifications in one transaction
+        with self.timed('db_write'):
+            await self.db.save_bounties(sorted_bounties, notifications)
+            await self._store_signatures()
+        print(f"💾 Saved latest bounties to database, {len(notifications)} notifications queued")
+    
+    def route(self, new_bounties: List[Bounty]) -> Dict[str, List[Bounty]]:
+        """Bounties per chat: all of them for the main chat (and email), matching ones for each subscriber"""
+        deliveries = {self.telegram_chat_id: list(new_bounties)}
+        if self.email_recipient and new_bounties:
+            deliveries[EMAIL_PREFIX + self.email_recipient] = list(new_bounties)
+        if not len(self.subscriptions):
+            return deliveries
+        for bounty in new_bounties:
+            for chat_id in self.subscriptions.chats_for(bounty):
+                if chat_id != self.telegram_chat_id:
+                    deliveries.setdefault(chat_id, []).append(bounty)
+        return deliveries
+    
+    async def send_notifications(self, force: bool = True):
+        """Send every due notification in the outbox, including ones left by earlier runs"""
+        sent = await self.outbox.drain(force=force)
+        if sent:
+            print(f"📢 Sent {sent} notifications")
+    
+    async def close_notifier(self):
+        """Close the Telegram (and SMTP) session"""
+        await self.notifier.close()
+        if self.email:
+            await self.email.close()
+    
+    async def run(self, metrics_file: Optional[str] = None):
+        """Main execution method"""
+        print("🔍 Starting bounty scraper...")
+        
+        # Connect to database
+        await self.db.connect()
+        
+        try:
+            await self.run_cycle()
         finally:
+            await self.close_http()
+            await self.close_notifier()
             # Close database connection
             await self.db.close()
+            if metrics_file:
+                self.metrics.write_textfile(metrics_file)
+    
+    async def run_daemon(self, interval: int = 300, recycle_after: int = 50, max_browser_rss_mb: float = 1024,
+                         metrics_port: Optional[int] = None, metrics_host: str = '127.0.0.1',
+                         metrics_file: Optional[str] = None, scheduler: Optional[PollScheduler] = None):
+        """Keep one warm browser alive and re-poll the bounties page"""
+        if scheduler is None:
+            scheduler = PollScheduler(interval, min_interval=interval, max_interval=interval, jitter=0)
+            print(f"👀 Starting bounty scraper in daemon mode (polling every {interval}s)...")
+        else:
+            print(f"👀 Starting bounty scraper in daemon mode "
+                  f"(polling every {scheduler.min_interval:.0f}-{scheduler.max_interval:.0f}s)...")
+        
+        await self.db.connect()
+        metrics_server = await self.metrics.serve(metrics_port, metrics_host) if metrics_port else None
+        # Sends notifications independently of the scrape loop
+        outbox_worker = asyncio.create_task(self.outbox.run())
+        # Browsers launched for HTTP mode's fallback stay warm too
+        self.keep_browser = True
+        cycles = 0
+        
+        try:
+            while True:
+                if scheduler.history_stale():
+                    await self._load_arrival_history(scheduler)
+                
+                if self.browser is not None and not self.browser_alive():
+                    print("💥 Browser disconnected, relaunching...")
+                    await self.close_browser()
+                # HTTP mode only launches a browser once a poll needs one
+                if not self.http and not self.browser_alive():
+                    try:
+                        await self.start_browser()
+                    except Exception as e:
+                        print(f"❌ Failed to launch browser: {e}")
+                        scheduler.record_error()
+                        await asyncio.sleep(scheduler.next_interval())
+                        continue
+                
+                try:
+                    await self.run_cycle()
+                except Exception as e:
+                    print(f"❌ Scrape cycle failed: {e}")
+                    scheduler.record_error()
+                else:
+                    self._record_poll(scheduler)
+                # Cycles run on the current browser
+                cycles = cycles + 1 if self.browser_alive() else 0
+                if metrics_file:
+                    self.metrics.write_textfile(metrics_file)
+                
+                rss = browser_rss_mb()
+                if self.browser is not None and (
+                    cycles >= recycle_after or (max_browser_rss_mb and rss > max_browser_rss_mb)
+                ):
+                    print(f"♻️ Recycling browser after {cycles} cycles ({rss:.0f} MB RSS)")
+                    await self.close_browser()
+                    cycles = 0
+                
+                wait = scheduler.next_interval()
+                self.metrics.set('poll_interval_seconds', wait)
+                self.metrics.set('expected_arrivals_per_hour', scheduler.expected_rate() or 0)
+                print(f"⏲️ Next poll in {wait:.0f}s")
+                await asyncio.sleep(wait)
+        finally:
+            outbox_worker.cancel()
+            await asyncio.gather(outbox_worker, return_exceptions=True)
+            if metrics_server:
+                metrics_server.close()
+            self.keep_browser = False
+            await self.close_browser()
+            await self.close_http()
+            await self.close_notifier()
+            await self.db.close()
 
-async def main():
-    load_dotenv()  # Load environment variables
+    def _record_poll(self, scheduler: PollScheduler):
+        """Tell the scheduler how the last cycle went: rate limited, failed, or how many bounties it found"""
+        limited = [source for source in self.sources if source.status == 429]
+        if limited:
+            scheduler.record_error(rate_limited=True,
+                                   retry_after=max(source.retry_after or 0 for source in limited) or None)
+        elif all(source.failed for source in self.sources):
+            scheduler.record_error()
+        else:
+            scheduler.record(self.new_count)
+    
+    async def _load_arrival_history(self, scheduler: PollScheduler):
+        try:
+            counts, days = await self.db.get_arrival_counts(scheduler.history_days)
+        except Exception as e:
+            print(f"⚠️ Could not load bounty arrival history: {e}")
+            counts, days = {}, 0
+        scheduler.load_history(counts, days)
+
+def parse_args(argv: Optional[List[str]] = None, prog: Optional[str] = None,
+               daemon: Optional[bool] = None) -> argparse.Namespace:
+    """Options of a scrape, `daemon` fixes the mode instead of offering --daemon (cli.py's commands)"""
+    parser = argparse.ArgumentParser(prog=prog, description="Replit bounty scraper")
+    if daemon is None:
+        parser.add_argument('--daemon', action='store_true',
+                            help="keep a warm browser running and poll continuously")
+    else:
+        parser.set_defaults(daemon=daemon)
+    if daemon is not False:
+        # Daemon mode only, a single scrape doesn't offer them
+        parser.add_argument('--interval', type=int, default=int(os.getenv('POLL_INTERVAL', '300')),
+                            help="seconds between polls in daemon mode when there is no arrival data yet "
+                                 "(default: 300)")
+        parser.add_argument('--min-interval', type=int, default=int(os.getenv('POLL_MIN_INTERVAL', '60')),
+                            help="shortest wait between polls in daemon mode (default: 60)")
+        parser.add_argument('--max-interval', type=int, default=int(os.getenv('POLL_MAX_INTERVAL', '1800')),
+                            help="longest wait between polls in daemon mode, also after errors (default: 1800)")
+        parser.add_argument('--fixed-interval', action='store_true',
+                            help="always wait --interval seconds between polls instead of adapting to activity")
+        parser.add_argument('--recycle-after', type=int, default=int(os.getenv('BROWSER_RECYCLE_AFTER', '50')),
+                            help="relaunch the browser after this many cycles (default: 50)")
+        parser.add_argument('--max-browser-rss-mb', type=float,
+                            default=float(os.getenv('BROWSER_MAX_RSS_MB', '1024')),
+                            help="relaunch the browser once its memory exceeds this (default: 1024, 0 disables)")
+        parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT', '0')) or None,
+                            help="serve Prometheus metrics on this port at /metrics (daemon mode)")
+        parser.add_argument('--metrics-host', default=os.getenv('METRICS_HOST', '127.0.0.1'),
+                            help="address to serve metrics on (default: 127.0.0.1, 0.0.0.0 for every interface)")
+    parser.add_argument('--crawl', action='store_true',
+                        help="scroll through the list until the last seen bounty instead of reading the first page")
+    parser.add_argument('--digest', action='store_true',
+                        help="send new bounties as a few digest messages instead of one message each")
+    parser.add_argument('--digest-max-items', type=int, default=int(os.getenv('DIGEST_MAX_ITEMS', '50')),
+                        help="send the digest once it holds this many bounties (default: 50)")
+    parser.add_argument('--digest-max-delay', type=float, default=float(os.getenv('DIGEST_MAX_DELAY', '0')),
+                        help="seconds a bounty may wait for more to join its digest (default: 0, send every cycle)")
+    parser.add_argument('--metrics-file', default=os.getenv('METRICS_FILE'),
+                        help="write Prometheus metrics to this file after every run (textfile collector)")
+    parser.add_argument('--lean', action='store_true',
+                        help="skip images, fonts, media, stylesheets and trackers when loading the page")
+    parser.add_argument('--dom-only', action='store_true',
+                        help="skip reading bounties from the page's API responses")
+    parser.add_argument('--source', action='append', type=parse_source, metavar='NAME=URL',
+                        help="bounty list to watch, repeatable (default: newest Replit bounties, "
+                             "or the space-separated specs in BOUNTY_SOURCES)")
+    parser.add_argument('--max-pages', type=int, default=int(os.getenv('MAX_PAGES', '3')),
+                        help="most pages open at once when scraping several sources (default: 3)")
+    parser.add_argument('--no-change-detection', action='store_true',
+                        help="extract every card on every poll, even when the list hasn't changed")
+    parser.add_argument('--http', action='store_true',
+                        help="read bounties with plain HTTP requests, launching the browser only when that fails")
+    parser.add_argument('--email', action='store_true',
+                        help="also email new bounties to RECIPIENT_EMAIL (SMTP login from SENDER_EMAIL/SENDER_PASSWORD)")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None, prog: Optional[str] = None, daemon: Optional[bool] = None):
+    args = parse_args(argv, prog, daemon)
     telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
     telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
     
@@ -275,8 +1273,36 @@ async def main():
         print("   - TELEGRAM_CHAT_ID")
         return
     
-    scraper = BountyScraper(telegram_bot_token, telegram_chat_id)
-    await scraper.run()
+    email = EmailNotifier.from_env() if args.email else None
+    email_recipient = os.getenv('RECIPIENT_EMAIL')
+    if args.email and (email is None or not email_recipient):
+        print("❌ --email needs SENDER_EMAIL, SENDER_PASSWORD and RECIPIENT_EMAIL")
+        return
+    
+    sources = args.source or [parse_source(spec) for spec in os.getenv('BOUNTY_SOURCES', '').split()]
+    scraper = BountyScraper(telegram_bot_token, telegram_chat_id,
+                            use_api=not args.dom_only, crawl=args.crawl, digest=args.digest,
+                            digest_max_items=args.digest_max_items, digest_max_delay=args.digest_max_delay,
+                            lean=args.lean, change_detection=not args.no_change_detection,
+                            sources=sources or None, max_pages=args.max_pages,
+                            email=email, email_recipient=email_recipient, http=args.http)
+    if args.daemon:
+        scheduler = None
+        if not args.fixed_interval:
+            scheduler = PollScheduler(args.interval, min_interval=args.min_interval, max_interval=args.max_interval)
+        await scraper.run_daemon(
+            interval=args.interval,
+            recycle_after=args.recycle_after,
+            max_browser_rss_mb=args.max_browser_rss_mb,
+            metrics_port=args.metrics_port,
+            metrics_host=args.metrics_host,
+            metrics_file=args.metrics_file,
+            scheduler=scheduler
+        )
+    else:
+        await scraper.run(metrics_file=args.metrics_file)
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Load environment variables from .env file
     asyncio.run(main())
\ No newline at end of file
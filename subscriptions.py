@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+from bounty import Bounty
+from db import Database
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text, the unit keywords are matched on"""
+    return WORD_RE.findall((text or '').lower())
+
+
+class Subscription:
+    """One subscriber's rule, every filter that is set has to match"""
+
+    def __init__(self, id: int, chat_id: str, min_price_cents: Optional[int] = None,
+                 max_price_cents: Optional[int] = None, keywords: Iterable[str] = (),
+                 exclude_keywords: Iterable[str] = (), authors: Iterable[str] = ()):
+        self.id = id
+        self.chat_id = chat_id
+        self.min_price_cents = min_price_cents
+        self.max_price_cents = max_price_cents
+        self.keywords = [tuple(words) for words in map(tokenize, keywords) if words]
+        self.exclude_keywords = [tuple(words) for words in map(tokenize, exclude_keywords) if words]
+        self.authors = {author.lower().lstrip('@') for author in authors if author}
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Subscription':
+        return cls(
+            id=row['id'],
+            chat_id=row['chat_id'],
+            min_price_cents=row['min_price_cents'],
+            max_price_cents=row['max_price_cents'],
+            keywords=row['keywords'] or (),
+            exclude_keywords=row['exclude_keywords'] or (),
+            authors=row['authors'] or (),
+        )
+
+    def matches(self, text: str, author: str, cents: Optional[int]) -> bool:
+        """Check every filter; `text` is the bounty's words joined by spaces, padded with one on each side"""
+        if self.min_price_cents is not None or self.max_price_cents is not None:
+            if cents is None:
+                return False
+            if self.min_price_cents is not None and cents < self.min_price_cents:
+                return False
+            if self.max_price_cents is not None and cents > self.max_price_cents:
+                return False
+        if self.authors and author not in self.authors:
+            return False
+        if self.keywords and not any(f" {' '.join(words)} " in text for words in self.keywords):
+            return False
+        return not any(f" {' '.join(words)} " in text for words in self.exclude_keywords)
+
+
+def upper_bound(subscription: Subscription) -> float:
+    return float('inf') if subscription.max_price_cents is None else subscription.max_price_cents
+
+
+class SubscriptionIndex:
+    """Finds the subscriptions matching a bounty without checking every rule"""
+
+    def __init__(self, subscriptions: Iterable[Subscription]):
+        self.by_word: Dict[str, List[Subscription]] = {}
+        self.by_author: Dict[str, List[Subscription]] = {}
+        # Rules without keywords, authors or a price range match nearly every
+        # bounty (all but the excluded ones), so they are always candidates
+        self.unfiltered: List[Subscription] = []
+        ranged: List[Subscription] = []
+        self.size = 0
+
+        for subscription in subscriptions:
+            self.size += 1
+            if subscription.keywords:
+                for first_word in {words[0] for words in subscription.keywords}:
+                    self.by_word.setdefault(first_word, []).append(subscription)
+            elif subscription.authors:
+                for author in subscription.authors:
+                    self.by_author.setdefault(author, []).append(subscription)
+            elif subscription.min_price_cents is None and subscription.max_price_cents is None:
+                self.unfiltered.append(subscription)
+            else:
+                ranged.append(subscription)
+
+        # Price range rules by lower and by upper bound, missing bounds are open ends
+        self.by_min_price = sorted(ranged, key=lambda s: (s.min_price_cents or 0, s.id))
+        self.min_prices = [s.min_price_cents or 0 for s in self.by_min_price]
+        self.by_max_price = sorted(ranged, key=lambda s: (upper_bound(s), s.id))
+        self.max_prices = [upper_bound(s) for s in self.by_max_price]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def match(self, bounty: Bounty) -> List[Subscription]:
+        """Subscriptions whose rules the bounty satisfies, in index order"""
+        words = tokenize(f"{bounty.title} {bounty.description}")
+        text = f" {' '.join(words)} "
+        author = bounty.author.lower().lstrip('@')
+        cents = bounty.price_cents
+
+        candidates: List[Subscription] = []
+        for word in set(words):
+            candidates.extend(self.by_word.get(word, ()))
+        candidates.extend(self.by_author.get(author, ()))
+        candidates.extend(self.unfiltered)
+        if cents is not None:
+            # Price rules need minimum <= price <= maximum: take the shorter of the two ranges
+            below = bisect_right(self.min_prices, cents)
+            above = bisect_left(self.max_prices, cents)
+            if below <= len(self.by_max_price) - above:
+                candidates.extend(self.by_min_price[:below])
+            else:
+                candidates.extend(self.by_max_price[above:])
+
+        seen: Set[int] = set()
+        matched = []
+        for subscription in candidates:
+            if subscription.id in seen:
+                continue
+            seen.add(subscription.id)
+            if subscription.matches(text, author, cents):
+                matched.append(subscription)
+        return matched
+
+    def chats_for(self, bounty: Bounty) -> List[str]:
+        """Chat IDs that should hear about the bounty, each once"""
+        return list(dict.fromkeys(subscription.chat_id for subscription in self.match(bounty)))
+
+
+async def load_index(db: Database) -> SubscriptionIndex:
+    """Build the index from the subscriptions table"""
+    return SubscriptionIndex(Subscription.from_row(row) for row in await db.get_subscriptions())
+
+
+def dollars_to_cents(value: Optional[float]) -> Optional[int]:
+    return None if value is None else round(value * 100)
+
+
+async def _manage(args: argparse.Namespace):
+    db = Database()
+    await db.connect()
+    try:
+        if args.command == 'add':
+            subscription_id = await db.add_subscription(
+                args.chat_id,
+                min_price_cents=dollars_to_cents(args.min_price),
+                max_price_cents=dollars_to_cents(args.max_price),
+                keywords=args.keyword,
+                exclude_keywords=args.exclude,
+                authors=args.author,
+            )
+            print(f"✅ Added subscription {subscription_id} for chat {args.chat_id}")
+        elif args.command == 'remove':
+            if await db.delete_subscription(args.id):
+                print(f"🗑️ Removed subscription {args.id}")
+            else:
+                print(f"❌ No subscription with ID {args.id}")
+        else:
+            rows = await db.get_subscriptions()
+            for row in rows:
+                price = ""
+                if row['min_price_cents'] is not None or row['max_price_cents'] is not None:
+                    low = f"${row['min_price_cents'] / 100:,.2f}" if row['min_price_cents'] is not None else "any"
+                    high = f"${row['max_price_cents'] / 100:,.2f}" if row['max_price_cents'] is not None else "any"
+                    price = f" price {low}-{high}"
+                print(f"{row['id']}: chat {row['chat_id']}{price}"
+                      f" keywords={list(row['keywords'])} exclude={list(row['exclude_keywords'])}"
+                      f" authors={list(row['authors'])}")
+            print(f"📋 {len(rows)} subscriptions")
+    finally:
+        await db.close()
+
+
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Manage bounty notification subscriptions")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="subscribe a chat to bounties matching some filters")
+    add.add_argument('chat_id', help="Telegram chat to notify")
+    add.add_argument('--min-price', type=float, help="minimum price in dollars")
+    add.add_argument('--max-price', type=float, help="maximum price in dollars")
+    add.add_argument('--keyword', action='append', default=[],
+                     help="word or phrase the title or description must contain (repeatable, any of them)")
+    add.add_argument('--exclude', action='append', default=[],
+                     help="word or phrase that rules a bounty out (repeatable)")
+    add.add_argument('--author', action='append', default=[], help="only bounties by this author (repeatable)")
+
+    remove = commands.add_parser('remove', help="delete a subscription")
+    remove.add_argument('id', type=int)
+
+    commands.add_parser('list', help="show every subscription")
+
+    asyncio.run(_manage(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Load environment variables from .env file
+    main()
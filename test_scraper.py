@@ -1,8 +1,67 @@
+import argparse
 import asyncio
 import json
 import os
+import random
+import re
 from unittest.mock import Mock, patch, AsyncMock
-from scraper import BountyScraper
+from urllib.request import Request, urlopen
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from benchmark import HEAVY_MODULES, import_times
+from bounty import Bounty, parse_price_cents
+from db import HISTORY_BACKFILLED, LEGACY_IDS_MIGRATED, bounty_fingerprint
+from email import message_from_bytes
+from notifier import EmailNotifier, TelegramNotifier, pack_digest, telegram_len
+from outbox import OutboxWorker
+from replay import FixtureServer, render_card, synthetic_bounties
+from scheduler import PollScheduler, parse_retry_after
+from subscriptions import Subscription, SubscriptionIndex
+from scraper import EXTRACTORS, BountyScraper, Source, bounties_from_payload, build_bounty, parse_args, parse_source, usable_bounties
+
+def fake_connection() -> Mock:
+    """Stand-in for an asyncpg connection"""
+    conn = Mock()
+    for method in ('execute', 'executemany', 'fetch', 'fetchval'):
+        setattr(conn, method, AsyncMock())
+    conn.transaction.return_value.__aenter__ = AsyncMock()
+    conn.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+    return conn
+
+def fake_pool(conn: Mock) -> Mock:
+    """Stand-in for an asyncpg pool that always hands out `conn`"""
+    pool = Mock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    pool.close = AsyncMock()
+    return pool
+
+class FakeOutboxDb:
+    """Stand-in for the notification outbox table, rows are (chat_id, bounty)"""
+    
+    def __init__(self, bounties):
+        now = datetime.now(timezone.utc)
+        self.rows = [{'id': i, 'chat_id': chat_id, 'bounty': bounty.to_json(), 'created_at': now,
+                      'due': True, 'sent': False, 'attempts': 0}
+                     for i, (chat_id, bounty) in enumerate(bounties, 1)]
+    
+    async def claim_notifications(self, limit, lease_seconds):
+        due = [row for row in self.rows if row['due'] and not row['sent']][:limit]
+        for row in due:
+            row['due'] = False
+        return [dict(row) for row in due]
+    
+    async def mark_notifications_sent(self, ids):
+        for row in self.rows:
+            row['sent'] = row['sent'] or row['id'] in ids
+    
+    async def retry_notifications(self, ids, error, backoff_seconds, max_attempts):
+        for row in self.rows:
+            if row['id'] in ids:
+                row['attempts'] += 1
+    
+    async def defer_notifications(self, ids, until):
+        pass
 
 class TestScraper:
     def __init__(self):
@@ -12,86 +71,884 @@ class TestScraper:
     
     def test_find_new_bounties(self):
         """Test new bounty detection logic"""
+        def bounty(id, title):
+            return Bounty(id=id, title=title, description='', author='', link=None)
+        
         previous = [
-            {'id': 1, 'title': 'Old Bounty 1'},
-            {'id': 2, 'title': 'Old Bounty 2'}
+            bounty('1', 'Old Bounty 1'),
+            bounty('2', 'Old Bounty 2')
         ]
         current = [
-            {'id': 1, 'title': 'Old Bounty 1'},
-            {'id': 3, 'title': 'New Bounty 1'},
-            {'id': 4, 'title': 'New Bounty 2'}
+            bounty('1', 'Old Bounty 1'),
+            bounty('3', 'New Bounty 1'),
+            bounty('4', 'New Bounty 2')
         ]
         
         new_bounties = self.scraper.find_new_bounties(current, previous)
         assert len(new_bounties) == 2
-        assert new_bounties[0]['id'] == 3
-        assert new_bounties[1]['id'] == 4
+        assert new_bounties[0].id == '3'
+        assert new_bounties[1].id == '4'
         print("✅ New bounty detection test passed")
     
-    def test_storage_operations(self):
+    def test_bounty_fingerprint(self):
+        """Test bounty IDs are stable and the same for a card and the API object of one bounty"""
+        bounty = build_bounty('Build a bot', '$250', 'Telegram  bot', 'alice', '/bounties/@alice/bot')
+        edited = build_bounty('Build a bot (edited title)', '$300 ', 'telegram bot, updated', 'Alice',
+                              'https://replit.com/bounties/@alice/bot?ref=feed')
+        other = build_bounty('Build a bot', '$250', 'Telegram  bot', 'alice', '/bounties/@alice/other-bot')
+        
+        assert bounty.id == edited.id
+        assert bounty.id != other.id
+        # Not salted per process like hash()
+        assert bounty.id == bounty_fingerprint('https://replit.com/bounties/@alice/bot', '', None, '')
+        assert len(bounty.id) == 32
+        # Without a link the numeric price is part of the ID
+        assert build_bounty('A', '$10', 'd', 'bob', None).id == build_bounty('A', '$10.00', 'd', 'bob', None).id
+        assert build_bounty('A', '$10', 'd', 'bob', None).id != build_bounty('A', '$11', 'd', 'bob', None).id
+        
+        # The fixture card shows 1050 cycles as "$10", the API object gives $10.50
+        item = synthetic_bounties(1)[0]
+        item['cycles'] = 1050
+        html = render_card(item)
+        card = {
+            'title': item['title'], 'link': re.search(r'href="([^"]+)"', html).group(1),
+            'price': re.search(r'css-4qqdjk">([^<]+)', html).group(1), 'description': item['descriptionPreview'],
+            'author': item['user']['username'], 'time_info': 'Due soon', 'status': item['status'],
+            'cycles': f"{item['cycles']:,}",
+        }
+        from_card = EXTRACTORS['replit'].from_card(card)
+        from_api = bounties_from_payload([item])[0]
+        assert from_card.price != from_api.price
+        assert from_card.id == from_api.id
+        
+        print("✅ Bounty fingerprint test passed")
+    
+    def bounty_row(self, b: Bounty) -> Dict:
+        """A bounties table row as asyncpg returns it"""
+        return {
+            'id': b.id, 'title': b.title, 'price': b.price, 'description': b.description, 'author': b.author,
+            'link': b.link, 'price_cents': b.price_cents, 'cycles': b.cycles, 'time_info': b.time_info,
+            'status': b.status, 'deadline': b.deadline, 'scraped_at': b.scraped_at, 'created_at': b.scraped_at,
+            'first_seen': b.scraped_at, 'last_seen': b.scraped_at,
+        }
+    
+    async def test_storage_operations(self):
         """Test saving and loading bounties"""
         test_bounties = [
-            {'id': 1, 'title': 'Test Bounty 1'},
-            {'id': 2, 'title': 'Test Bounty 2'}
+            build_bounty('Test Bounty 1', '$10', 'First', 'alice', '/bounties/@alice/one'),
+            build_bounty('Test Bounty 2', '$20', 'Second', 'bob', '/bounties/@bob/two')
         ]
+        conn = fake_connection()
+        conn.fetch.return_value = [self.bounty_row(b) for b in test_bounties]
+        self.scraper.db.pool = fake_pool(conn)
         
         # Test saving
-        self.scraper.save_bounties(test_bounties)
+        await self.scraper.save_bounties(test_bounties)
+        query, rows = conn.executemany.call_args[0]
+        assert 'ON CONFLICT (id) DO UPDATE' in query
+        assert 'DELETE' not in query
+        assert [row[0] for row in rows] == [b.id for b in test_bounties]
+        # Prices are stored as numbers next to the display string
+        assert rows[0][2] == '$10' and rows[0][9] == 1000
         
         # Test loading
-        loaded = self.scraper.load_previous_bounties()
+        loaded = await self.scraper.load_previous_bounties()
         assert len(loaded) == 2
-        assert loaded[0]['title'] == 'Test Bounty 1'
+        assert loaded[0].title == 'Test Bounty 1'
+        assert loaded[0].price == '$10'
+        
+        # Old hash() IDs are re-keyed on the first connect only, keeping their history
+        conn = fake_connection()
+        conn.fetchval.return_value = None
+        current = test_bounties[0]
+        first_seen = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        conn.fetch.return_value = [
+            {**self.bounty_row(current), 'id': current.id},
+            {**self.bounty_row(test_bounties[1]), 'id': '-7283921', 'first_seen': first_seen},
+        ]
+        await self.scraper.db._migrate_legacy_ids(conn)
+        assert conn.fetch.await_count == 1
+        assert conn.execute.call_args_list[0][0][1] == ['-7283921']
+        query, rows = conn.executemany.call_args[0]
+        assert [row[0] for row in rows] == [test_bounties[1].id]
+        assert rows[0][13] == first_seen and 'LEAST(bounties.first_seen' in query
+        assert conn.execute.call_args[0][1] == LEGACY_IDS_MIGRATED
+        conn.fetchval.return_value = 1
+        await self.scraper.db._migrate_legacy_ids(conn)
+        assert conn.fetch.await_count == 1
+        
+        # Rows from before first_seen / last_seen existed are dated from their own timestamps, once
+        conn = fake_connection()
+        conn.fetchval.return_value = None
+        await self.scraper.db._backfill_history(conn)
+        assert 'first_seen = LEAST(first_seen, created_at, scraped_at)' in conn.execute.call_args_list[0][0][0]
+        assert conn.execute.call_args[0][1] == HISTORY_BACKFILLED
+        conn.fetchval.return_value = 1
+        await self.scraper.db._backfill_history(conn)
+        assert conn.execute.await_count == 3
         
         # Cleanup
-        if os.path.exists(self.scraper.storage_file):
-            os.remove(self.scraper.storage_file)
+        self.scraper.db.pool = None
         
         print("✅ Storage operations test passed")
     
-    @patch('requests.post')
-    def test_telegram_notification(self, mock_post):
+    async def test_telegram_notification(self):
         """Test Telegram notification sending"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
-        
-        test_bounty = {
-            'title': 'Test Bounty',
-            'price': '$100',
-            'author': 'Test Author',
-            'description': 'Test description',
-            'link': 'https://test.com',
-            'scraped_at': '2024-01-01T00:00:00'
-        }
+        test_bounty = build_bounty('Test Bounty', '$100', 'Test description', 'Test Author', 'https://test.com')
         
-        self.scraper.send_telegram_notification(test_bounty)
+        with patch.object(self.scraper.notifier, '_post', AsyncMock(return_value=(200, {'ok': True}))) as mock_post:
+            assert await self.scraper.send_telegram_notification(test_bounty)
         
         assert mock_post.called
-        call_args = mock_post.call_args[1]
-        assert call_args['data']['chat_id'] == self.test_chat_id
-        assert 'Test Bounty' in call_args['data']['text']
+        chat_id, text, parse_mode = mock_post.call_args[0]
+        assert chat_id == self.test_chat_id
+        assert 'Test Bounty' in text
         
         print("✅ Telegram notification test passed")
     
+    async def test_telegram_rate_limit_retry(self):
+        """Test 429 responses are retried after Telegram's retry_after"""
+        notifier = TelegramNotifier("test_token", global_rate=1000, per_chat_rate=1000)
+        responses = [
+            (429, {'ok': False, 'parameters': {'retry_after': 0.01}}),
+            (200, {'ok': True}),
+            (400, {'ok': False, 'description': 'Bad Request: chat not found'}),
+        ]
+        
+        with patch.object(notifier, '_post', AsyncMock(side_effect=responses)) as mock_post:
+            assert await notifier.send_message('chat-a', 'first')
+            assert not await notifier.send_message('chat-b', 'second')
+        await notifier.close()
+        
+        # The 429 is retried, the 400 is not
+        assert mock_post.await_count == 3
+        assert notifier.sent == 1
+        assert notifier.failed == 1
+        
+        print("✅ Telegram rate limit retry test passed")
+    
+    async def test_digest_mode(self):
+        """Test new bounties are packed into few escaped messages under Telegram's limit"""
+        bounties = [build_bounty(
+            f'Bounty_{i} *urgent*', '$100', 'd' * 190, 'snake_case_user',
+            f'https://replit.com/bounties/@snake_case_user/b{i}',
+        ) for i in range(30)]
+        entries = [self.scraper.format_digest_entry(b) for b in bounties]
+        assert entries[0].startswith('• Bounty\\_0 \\*urgent\\* · $100')
+        # Escapes only ever appear outside an entity, where Telegram honours them
+        assert all(entry.count('*') == entry.count('\\*') for entry in entries)
+        
+        messages = pack_digest(entries)
+        assert len(messages) == 3
+        assert all(telegram_len(m) <= 4096 for m in messages)
+        assert sum(m.count('snake\\_case\\_user/') for m in messages) == 30
+        assert messages[0].startswith('🎯 *13 new Replit bounties* (1/3)')
+        
+        # The outbox sends a chat's pending bounties as those packed messages
+        notifier = TelegramNotifier("test_token")
+        db = FakeOutboxDb([('chat', bounty) for bounty in bounties])
+        worker = OutboxWorker(db, notifier, self.scraper.format_bounty_message, self.scraper.format_digest_entry,
+                              digest=True, digest_max_items=100)
+        with patch.object(notifier, 'send_message', AsyncMock(return_value=True)) as mock_send:
+            assert await worker.drain(force=True) == 3
+        await notifier.close()
+        assert [call.args[1] for call in mock_send.await_args_list] == messages
+        assert all(row['sent'] for row in db.rows)
+        
+        print("✅ Digest mode test passed")
+    
+    async def test_wait_for_bounty_list(self):
+        """Test readiness returns once the card count stops changing"""
+        counts = iter([3, 8, 15, 15, 15])
+        page = Mock()
+        page.wait_for_selector = AsyncMock()
+        page.wait_for_timeout = AsyncMock()
+        page.locator.return_value.count = AsyncMock(side_effect=lambda: next(counts))
+        
+        assert await self.scraper.wait_for_bounty_list(page, settle_ms=10)
+        # 3 -> 8 -> 15 are growing, then two stable windows at 15
+        assert page.wait_for_timeout.await_count == 4
+        
+        page.wait_for_selector = AsyncMock(side_effect=TimeoutError("no cards"))
+        assert not await self.scraper.wait_for_bounty_list(page, timeout=10)
+        
+        print("✅ Bounty list readiness test passed")
+    
+    def test_bounties_from_payload(self):
+        """Test building bounties from a captured GraphQL response"""
+        payload = {'data': {'bountySearch': {'__typename': 'BountySearchConnection', 'items': [
+            {'__typename': 'Bounty', 'id': 101, 'title': 'Build a bot', 'slug': 'build-a-bot',
+             'cycles': 25000, 'status': 'open', 'deadline': '2024-03-20T00:00:00.000Z',
+             'descriptionPreview': 'Telegram bot', 'user': {'username': 'alice'}},
+            {'__typename': 'Bounty', 'id': 102, 'title': 'Fix CSS', 'slug': 'fix-css',
+             'cycles': 1050, 'status': 'open', 'deadline': None,
+             'descriptionPreview': 'x' * 300, 'user': {'username': 'bob'}},
+        ]}}}
+        
+        bounties = bounties_from_payload(payload)
+        assert [b.title for b in bounties] == ['Build a bot', 'Fix CSS']
+        assert bounties[0].price == '$250'
+        assert bounties[0].price_cents == 25000
+        assert bounties[0].cycles == 25000
+        assert bounties[0].author == 'alice'
+        assert bounties[0].link == 'https://replit.com/bounties/@alice/build-a-bot'
+        assert bounties[0].deadline == datetime(2024, 3, 20, tzinfo=timezone.utc)
+        assert bounties[1].price == '$10.50'
+        assert len(bounties[1].description) == 203
+        
+        assert bounties_from_payload({'data': {'currentUser': {'title': 'Not a bounty'}}}) == []
+        
+        print("✅ API payload extraction test passed")
+    
+    async def test_extract_bounties(self):
+        """Test batched card extraction builds full bounty records in one call"""
+        page = Mock()
+        page.evaluate = AsyncMock(return_value={
+            'selector': 'li[class*="Surface_surfaceRoot"]',
+            'cards': [
+                {'title': 'Card Bounty', 'link': '/bounties/@carol/card-bounty', 'price': '$75',
+                 'description': 'From the DOM', 'author': 'carol', 'time_info': 'Due in 2 days',
+                 'status': 'Open', 'cycles': '7,500'},
+                {'title': None, 'link': None, 'price': None, 'description': None,
+                 'author': None, 'time_info': None, 'status': None, 'cycles': None},
+            ]
+        })
+        
+        bounties = await self.scraper._extract_bounties(page, limit=15)
+        assert page.evaluate.await_count == 1
+        assert page.evaluate.call_args[0][1]['limit'] == 15
+        assert bounties[0].link == 'https://replit.com/bounties/@carol/card-bounty'
+        assert bounties[0].cycles == 7500
+        assert bounties[1].title == 'No title'
+        assert bounties[1].price_cents is None
+        assert bounties[1].price == 'Price not found'
+        
+        print("✅ Batched extraction test passed")
+    
+    async def test_crawl_stops_at_known_bounty(self):
+        """Test crawl mode reads new cards page by page and stops at a known one"""
+        def card(n):
+            return Bounty(id=f'id{n}', title=f'Bounty {n}', description='', author='', link=None)
+        
+        pages = [[card(1), card(2)], [card(3), card(4)], [card(5)]]
+        offsets = []
+        
+        async def extract(page, offset=0, limit=None, source=None):
+            offsets.append(offset)
+            return pages[len(offsets) - 1]
+        
+        async def get_new_ids(ids):
+            return {i for i in ids if i not in ('id4', 'id5')}
+        
+        with patch.object(self.scraper, '_extract_bounties', side_effect=extract), \
+             patch.object(self.scraper, '_load_more', AsyncMock(return_value=True)), \
+             patch.object(self.scraper.db, 'get_new_ids', side_effect=get_new_ids):
+            new = await self.scraper._crawl(Mock(), [], [], self.scraper.sources[0])
+        
+        assert [b.title for b in new] == ['Bounty 1', 'Bounty 2', 'Bounty 3']
+        # Every step only reads the cards after the ones already collected
+        assert offsets == [0, 2]
+        
+        print("✅ Crawl early stop test passed")
+    
+    def test_fixture_server(self):
+        """Test the offline fixture serves the page and its API data"""
+        items = synthetic_bounties(100)
+        with FixtureServer(items) as server:
+            with urlopen(server.url) as response:
+                page = response.read().decode('utf-8')
+            request = Request(server.url.replace('/bounties', '/graphql'), data=b'{}', method='POST')
+            with urlopen(request) as response:
+                payload = json.loads(response.read())
+        
+        assert page.count('<li class="Surface_surfaceRoot__TeA2u css-r1hogs">') == 100
+        assert 'href="/bounties/@user_26/synthetic-bounty-100"' in page
+        bounties = bounties_from_payload(payload)
+        assert len(bounties) == 100
+        assert bounties[0].link == 'https://replit.com/bounties/@user_26/synthetic-bounty-100'
+        
+        print("✅ Fixture server test passed")
+    
+    async def test_replay_scrape(self):
+        """Test both extraction paths against fixture pages in a real browser"""
+        for client_rendered in (False, True):
+            with FixtureServer(synthetic_bounties(15), client_rendered=client_rendered) as server:
+                scraper = BountyScraper(self.test_bot_token, self.test_chat_id,
+                                        use_api=client_rendered, bounties_url=server.url)
+                try:
+                    await scraper.start_browser()
+                except Exception as e:
+                    print(f"⚠️ Skipping replay scrape test, Chromium is not available: {e}")
+                    return
+                try:
+                    bounties = await scraper.scrape_bounties(limit=None)
+                finally:
+                    await scraper.close_browser()
+            
+            assert len(bounties) == 15
+            assert bounties[0].title == 'Synthetic bounty #15'
+            assert bounties[0].price == '$160'
+            assert bounties[0].author == 'user_15'
+            assert bounties[0].link == 'https://replit.com/bounties/@user_15/synthetic-bounty-15'
+            assert {'navigation', 'readiness', 'extraction'} <= set(scraper.sources[0].timings)
+        
+        print("✅ Replay scrape test passed")
+    
+    async def test_daemon(self):
+        """Test the daemon recycles its browser, relaunches it after a crash and survives failed cycles"""
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        launches = 0
+        closes = 0
+        cycles = 0
+        
+        async def start_browser():
+            nonlocal launches
+            launches += 1
+            scraper.browser = Mock(is_connected=Mock(return_value=True))
+        
+        async def close_browser():
+            nonlocal closes
+            closes += 1
+            scraper.browser = None
+        
+        async def run_cycle():
+            nonlocal cycles
+            cycles += 1
+            if cycles == 2:
+                raise Exception("Navigation timeout")
+            if cycles == 4:
+                scraper.browser.is_connected.return_value = False
+        
+        class Stop(Exception):
+            pass
+        
+        # The fifth sleep ends the loop
+        sleep = AsyncMock(side_effect=[None, None, None, None, Stop()])
+        with patch.object(scraper, 'start_browser', side_effect=start_browser), \
+             patch.object(scraper, 'close_browser', side_effect=close_browser), \
+             patch.object(scraper, 'run_cycle', side_effect=run_cycle), \
+             patch.object(scraper.db, 'connect', AsyncMock()), \
+             patch.object(scraper.db, 'close', AsyncMock()), \
+             patch.object(scraper.db, 'get_arrival_counts', AsyncMock(return_value=({}, 0))), \
+             patch.object(scraper.outbox, 'run', AsyncMock()), \
+             patch.object(scraper, 'close_notifier', AsyncMock()), \
+             patch('scraper.browser_rss_mb', side_effect=[100, 100, 100, 100, 900]), \
+             patch('scraper.asyncio.sleep', sleep):
+            try:
+                await scraper.run_daemon(recycle_after=3, max_browser_rss_mb=500)
+            except Stop:
+                pass
+        
+        assert cycles == 5 and sleep.await_count == 5
+        # Launched at the start, after recycling at 3 cycles, and after the crash
+        assert launches == 3
+        # Recycled after 3 cycles, the crashed browser, recycled at 900 MB RSS, and on exit
+        assert closes == 4
+        assert not scraper.keep_browser
+        
+        print("✅ Daemon test passed")
+    
+    async def test_http_mode(self):
+        """Test HTTP mode reads embedded page data without a browser and falls back to it otherwise"""
+        items = synthetic_bounties(15)
+        with FixtureServer(items, embed_data=True) as server:
+            scraper = BountyScraper(self.test_bot_token, self.test_chat_id, bounties_url=server.url, http=True)
+            with patch.object(scraper, 'start_browser', AsyncMock()) as start_browser, \
+                 patch.object(scraper, 'scrape_bounties', AsyncMock()) as scrape_bounties:
+                bounties = await scraper.scrape_sources()
+                # Same records as reading the page's API responses in the browser
+                assert [b.id for b in bounties] == [b.id for b in bounties_from_payload(items)]
+                assert bounties[0].price == '$160' and bounties[0].author == 'user_15'
+                # Placeholders filled in for fields a payload lacks don't pass the schema check
+                assert usable_bounties(bounties)
+                assert not usable_bounties(bounties_from_payload([{'title': 'No author', 'slug': 'no-author'}]))
+                
+                # An unchanged list is recognised from the IDs alone
+                source = scraper.sources[0]
+                source.signature = source.current_signature
+                assert await scraper.scrape_sources() == [] and source.unchanged
+            assert not start_browser.called and not scrape_bounties.called
+            assert scraper.metrics.get('http_scrapes_total') == 2
+            await scraper.close_http()
+        
+        # A page without embedded bounty data fails the schema check and goes through the browser
+        with FixtureServer(items) as server:
+            scraper = BountyScraper(self.test_bot_token, self.test_chat_id, bounties_url=server.url,
+                                    http=True, change_detection=False)
+            from_browser = bounties_from_payload(items)[:2]
+            with patch.object(scraper, 'start_browser', AsyncMock()) as start_browser, \
+                 patch.object(scraper, 'close_browser', AsyncMock()), \
+                 patch.object(scraper, 'scrape_bounties', AsyncMock(return_value=from_browser)) as scrape_bounties:
+                assert await scraper.scrape_sources() == from_browser
+            assert start_browser.called and scrape_bounties.called
+            assert scraper.metrics.get('http_fallbacks_total') == 1
+            await scraper.close_http()
+        
+        print("✅ HTTP mode test passed")
+    
+    async def test_metrics(self):
+        """Test a cycle records phase timings and counters and serves them on /metrics"""
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        bounties = [build_bounty(f'Bounty {i}', '$10', 'desc', 'alice', f'/b/{i}') for i in range(3)]
+        
+        async def scrape_sources(crawl=False):
+            with scraper.timed('extraction', scraper.sources[0]):
+                return bounties
+        
+        outbox = [{'id': 1, 'chat_id': self.test_chat_id, 'bounty': bounties[0].to_json(), 'created_at': None}]
+        
+        with patch.object(scraper, 'scrape_sources', side_effect=scrape_sources), \
+             patch.object(scraper.db, 'get_state', AsyncMock(return_value=None)), \
+             patch.object(scraper.db, 'get_subscriptions', AsyncMock(return_value=[])), \
+             patch.object(scraper.db, 'get_new_ids', AsyncMock(return_value={bounties[0].id})), \
+             patch.object(scraper.db, 'save_bounties', AsyncMock()) as save, \
+             patch.object(scraper.db, 'claim_notifications', AsyncMock(side_effect=[outbox, []])), \
+             patch.object(scraper.db, 'mark_notifications_sent', AsyncMock()), \
+             patch.object(scraper.db, 'retry_notifications', AsyncMock()), \
+             patch.object(scraper.notifier, '_post', AsyncMock(return_value=(200, {'ok': True}))):
+            await scraper.run_cycle()
+        await scraper.notifier.close()
+        assert save.call_args[0][1] == [(self.test_chat_id, bounties[0])]
+        
+        assert scraper.metrics.get('runs_total') == 1
+        assert scraper.metrics.get('cards_found_total') == 3
+        assert scraper.metrics.get('new_bounties_total') == 1
+        assert scraper.metrics.get('notifications_sent_total') == 1
+        
+        server = await scraper.metrics.serve(0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode('utf-8')
+        writer.close()
+        server.close()
+        
+        assert response.startswith('HTTP/1.1 200 OK')
+        for phase in ('extraction', 'dedup', 'db_write', 'notify'):
+            assert f'bounty_scraper_phase_seconds_count{{phase="{phase}"}} 1' in response
+        # One Telegram message went out
+        assert 'bounty_scraper_phase_seconds_count{phase="send"} 1' in response
+        assert 'bounty_scraper_cards_found_total 3' in response
+        assert 'bounty_scraper_new_bounties_total 1' in response
+        
+        print("✅ Metrics test passed")
+    
+    async def test_lean_mode_routing(self):
+        """Test lean mode aborts assets and trackers but keeps what renders the list"""
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id, lean=True)
+        
+        def route(resource_type, url):
+            fake = Mock()
+            fake.request.resource_type = resource_type
+            fake.request.url = url
+            fake.abort = AsyncMock()
+            fake.continue_ = AsyncMock()
+            return fake
+        
+        requests = {
+            'document': route('document', 'https://replit.com/bounties'),
+            'script': route('script', 'https://replit.com/_next/static/app.js'),
+            'graphql': route('fetch', 'https://replit.com/graphql'),
+            'image': route('image', 'https://replit.com/public/hero.png'),
+            'font': route('font', 'https://fonts.gstatic.com/ibm-plex.woff2'),
+            'analytics': route('script', 'https://www.googletagmanager.com/gtag/js'),
+        }
+        for fake in requests.values():
+            await scraper._route_lean(fake)
+        
+        for name in ('document', 'script', 'graphql'):
+            assert requests[name].continue_.await_count == 1 and requests[name].abort.await_count == 0
+        for name in ('image', 'font', 'analytics'):
+            assert requests[name].abort.await_count == 1 and requests[name].continue_.await_count == 0
+        assert scraper.page_stats['blocked'] == {'image': 1, 'font': 1, 'tracking': 1}
+        
+        # Bytes are the transfer sizes of finished requests, with or without Content-Length
+        source = scraper.sources[0]
+        request = Mock(sizes=AsyncMock(return_value={
+            'requestHeadersSize': 300, 'requestBodySize': 0, 'responseHeadersSize': 200, 'responseBodySize': 40000,
+        }))
+        await scraper._count_request_bytes(request, source)
+        assert source.page_bytes == 40200 and scraper.metrics.get('page_bytes_total') == 40200
+        
+        # A lean load is compared with the last normal load of the page
+        scraper.db.get_state = AsyncMock(return_value='100200')
+        scraper.db.set_state = AsyncMock()
+        await scraper._report_bytes_saved()
+        assert scraper.metrics.get('page_bytes_saved_total') == 60000
+        assert scraper.db.set_state.await_count == 0
+        
+        # Normal loads keep that baseline up to date
+        scraper.lean = False
+        source.page_bytes = 104000
+        await scraper._report_bytes_saved()
+        assert scraper.db.set_state.await_count == 0
+        source.page_bytes = 150000
+        await scraper._report_bytes_saved()
+        scraper.db.set_state.assert_awaited_once_with(source.bytes_key, '150000')
+        assert scraper.db.get_state.await_count == 1
+        
+        print("✅ Lean mode routing test passed")
+    
+    async def test_change_detection(self):
+        """Test an unchanged list skips extraction and only changed cards are re-read"""
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        source = scraper.sources[0]
+        page = Mock()
+        page.evaluate = AsyncMock(return_value=['a1:10', 'b2:12', 'c3:9'])
+        
+        # Nothing stored yet, so everything gets extracted
+        first = await scraper._list_signature(page, [], 15, source.extractor)
+        assert scraper._changed_cards(first, source) is None
+        
+        source.signature = first
+        assert scraper._changed_cards(await scraper._list_signature(page, [], 15, source.extractor), source) == []
+        
+        # A new card on top and an edited one further down
+        page.evaluate = AsyncMock(return_value=['d4:11', 'a1:10', 'b2:13', 'c3:9'])
+        second = await scraper._list_signature(page, [], 15, source.extractor)
+        assert second['digest'] != first['digest']
+        assert scraper._changed_cards(second, source) == [0, 2]
+        
+        # API captures are compared by their fields, an edit keeps the ID but changes the card
+        captured = [build_bounty('API Bounty', '$10', 'From the API', 'dave', '/bounties/@dave/api')]
+        signature = await scraper._list_signature(page, captured, 15, source.extractor)
+        source.signature = signature
+        repriced = [build_bounty('API Bounty', '$20', 'From the API', 'dave', '/bounties/@dave/api')]
+        assert repriced[0].id == captured[0].id
+        assert scraper._changed_cards(await scraper._list_signature(page, repriced, 15, source.extractor), source) == [0]
+        
+        # An unchanged poll stops before dedup and the database write
+        scraper.db.get_new_ids = AsyncMock()
+        scraper.db.save_bounties = AsyncMock()
+        
+        async def unchanged_scrape(*args, **kwargs):
+            source.unchanged = True
+            return []
+        
+        with patch.object(scraper, 'scrape_sources', side_effect=unchanged_scrape):
+            await scraper._run_cycle()
+        assert scraper.db.get_new_ids.await_count == 0
+        assert scraper.db.save_bounties.await_count == 0
+        assert scraper.metrics.get('unchanged_polls_total') == 1
+        
+        # A scrape that fails after taking the signature doesn't store it, or the new card would never be read
+        source.signature = {'digest': 'before', 'cards': ['old:1']}
+        page = Mock()
+        page.on = Mock()
+        page.goto = AsyncMock(return_value=Mock(status=200))
+        page.screenshot = AsyncMock()
+        page.close = AsyncMock()
+        scraper.context = Mock(new_page=AsyncMock(return_value=page))
+        scraper.use_api = False
+        scraper.db.set_state = AsyncMock()
+        with patch.object(scraper, 'browser_alive', return_value=True), \
+             patch.object(scraper, 'wait_for_bounty_list', AsyncMock(return_value=True)), \
+             patch.object(scraper, '_list_signature', AsyncMock(return_value={'digest': 'after', 'cards': ['new:1', 'old:1']})), \
+             patch.object(scraper, '_extract_bounties', AsyncMock(side_effect=Exception("Target closed"))):
+            assert await scraper.scrape_bounties() == []
+        assert source.failed and source.current_signature is None
+        await scraper._store_signatures()
+        assert scraper.db.set_state.await_count == 0 and source.signature['digest'] == 'before'
+        
+        # Card hashes leave out text that changes by itself, like the time remaining
+        with FixtureServer(synthetic_bounties(5)) as server:
+            scraper = BountyScraper(self.test_bot_token, self.test_chat_id, bounties_url=server.url)
+            source = scraper.sources[0]
+            try:
+                await scraper.start_browser()
+            except Exception as e:
+                print(f"⚠️ Skipping card hash check, Chromium is not available: {e}")
+            else:
+                try:
+                    page = await scraper.context.new_page()
+                    await page.goto(server.url)
+                    source.signature = await scraper._list_signature(page, [], None, source.extractor)
+                    await page.evaluate("""() => document.querySelectorAll('.css-149xez1 span')
+                        .forEach(span => { span.innerText = 'Due in 2 days'; })""")
+                    signature = await scraper._list_signature(page, [], None, source.extractor)
+                    assert scraper._changed_cards(signature, source) == []
+                    await page.evaluate("() => { document.querySelectorAll('.css-4qqdjk')[1].innerText = '$99'; }")
+                    signature = await scraper._list_signature(page, [], None, source.extractor)
+                    assert scraper._changed_cards(signature, source) == [1]
+                finally:
+                    await scraper.close_browser()
+        
+        print("✅ Change detection test passed")
+    
+    async def test_multi_source(self):
+        """Test sources are scraped concurrently, within the page limit, into one deduplicated list"""
+        sources = [
+            Source('newest', 'https://replit.com/bounties?order=creationDateDescending'),
+            Source('python', 'https://replit.com/bounties?query=python'),
+            parse_source('bots=https://replit.com/bounties?query=bot'),
+        ]
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id, sources=sources, max_pages=2)
+        shared = build_bounty('Python bot', '$50', 'In two lists', 'erin', '/bounties/@erin/python-bot')
+        open_pages = 0
+        most_open = 0
+        
+        async def scrape_bounties(limit=15, crawl=False, source=None):
+            nonlocal open_pages, most_open
+            open_pages += 1
+            most_open = max(most_open, open_pages)
+            await asyncio.sleep(0.01)
+            open_pages -= 1
+            own = build_bounty(f'Only in {source.name}', '$10', 'desc', 'frank', f'/bounties/@frank/{source.name}')
+            return [own, shared] if source.name != 'newest' else [own]
+        
+        with patch.object(scraper, 'browser_alive', return_value=True), \
+             patch.object(scraper, 'scrape_bounties', side_effect=scrape_bounties):
+            bounties = await scraper.scrape_sources()
+        
+        assert most_open == 2
+        assert [b.title for b in bounties] == [
+            'Only in newest', 'Only in python', 'Python bot', 'Only in bots'
+        ]
+        assert sources[2].name == 'bots' and sources[2].extractor.name == 'replit'
+        
+        try:
+            parse_source('no-url')
+            assert False, "expected a bad source spec to be rejected"
+        except argparse.ArgumentTypeError:
+            pass
+        
+        print("✅ Multi-source test passed")
+    
+    def test_subscriptions(self):
+        """Test subscription rules are matched through the indexes and routed per chat"""
+        assert parse_price_cents('$1,234.50') == 123450
+        assert parse_price_cents('Price not found', '7,500') == 7500
+        assert parse_price_cents('Price not found', '0') is None
+        
+        index = SubscriptionIndex([
+            Subscription(1, 'python-fans', keywords=['python', 'machine learning'], exclude_keywords=['homework']),
+            Subscription(2, 'big-spenders', min_price_cents=10000),
+            Subscription(3, 'carol-watchers', authors=['@Carol']),
+            Subscription(4, 'cheap-bots', max_price_cents=5000, keywords=['bot']),
+            Subscription(5, 'everything'),
+        ])
+        
+        def bounty(title, price, author='dave', description='desc'):
+            return build_bounty(title, price, description, author, f'/bounties/@{author}/{title}')
+        
+        def chats(b):
+            return set(index.chats_for(b))
+        
+        assert chats(bounty('Python scraper', '$150')) == {'python-fans', 'big-spenders', 'everything'}
+        assert chats(bounty('Fix my Python homework', '$20')) == {'everything'}
+        assert chats(bounty('Machine learning model', '$20')) == {'python-fans', 'everything'}
+        # "machine" alone doesn't complete the phrase
+        assert chats(bounty('Machine vision', '$20')) == {'everything'}
+        assert chats(bounty('Discord bot', '$30', author='carol')) == {'cheap-bots', 'carol-watchers', 'everything'}
+        # Price rules never match bounties without a known price
+        assert chats(bounty('Discord bot', 'Price not found')) == {'everything'}
+        
+        # Price ranges are bisected on both bounds, so only the rules near the price are checked
+        ranges = SubscriptionIndex(
+            Subscription(i, f'range-{i}', min_price_cents=i * 100, max_price_cents=i * 100 + 500) for i in range(1000)
+        )
+        with patch.object(Subscription, 'matches', autospec=True, side_effect=Subscription.matches) as checked:
+            assert [s.id for s in ranges.match(bounty('Big job', '$990'))] == list(range(985, 991))
+        assert checked.call_count == 15
+        
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        scraper.subscriptions = index
+        new = [bounty('Python scraper', '$150'), bounty('Discord bot', '$30')]
+        deliveries = scraper.route(new)
+        assert deliveries[self.test_chat_id] == new
+        assert deliveries['python-fans'] == [new[0]]
+        assert deliveries['cheap-bots'] == [new[1]]
+        assert deliveries['everything'] == new
+        
+        print("✅ Subscriptions test passed")
+    
+    async def test_notification_outbox(self):
+        """Test the outbox worker sends queued notifications, retries failures and packs digests"""
+        bounties = [build_bounty(f'Bounty {i}', '$10', 'desc', 'alice', f'/b/{i}') for i in range(3)]
+        db = FakeOutboxDb([('chat-a', bounties[0]), ('chat-a', bounties[1]), ('chat-b', bounties[2])])
+        notifier = TelegramNotifier("test_token")
+        worker = OutboxWorker(db, notifier, self.scraper.format_bounty_message, self.scraper.format_digest_entry)
+        
+        # chat-b's message fails and stays queued for a retry
+        async def send_message(chat_id, text, parse_mode='Markdown'):
+            return chat_id == 'chat-a'
+        
+        with patch.object(notifier, 'send_message', side_effect=send_message):
+            assert await worker.drain() == 2
+        assert [row['sent'] for row in db.rows] == [True, True, False]
+        assert db.rows[2]['attempts'] == 1
+        
+        # Digests wait for more bounties unless forced
+        db = FakeOutboxDb([('chat-a', bounty) for bounty in bounties])
+        worker = OutboxWorker(db, notifier, self.scraper.format_bounty_message, self.scraper.format_digest_entry,
+                              digest=True, digest_max_items=10, digest_max_delay=3600)
+        with patch.object(notifier, 'send_message', AsyncMock(return_value=True)) as mock_send:
+            assert await worker.drain() == 0
+            for row in db.rows:
+                row['due'] = True
+            assert await worker.drain(force=True) == 1
+        assert mock_send.call_args[0][1].startswith('🎯 *3 new Replit bounties*')
+        assert all(row['sent'] for row in db.rows)
+        await notifier.close()
+        
+        # Notifications are written in the bounty upsert's transaction, once per chat and bounty
+        conn = fake_connection()
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        scraper.db.pool = fake_pool(conn)
+        await scraper.db.save_bounties(bounties, [('chat-a', bounties[0])])
+        assert conn.transaction.call_count == 1
+        query, rows = conn.executemany.call_args[0]
+        assert 'ON CONFLICT (idempotency_key) DO NOTHING' in query
+        assert rows[0][:3] == (f"chat-a:{bounties[0].id}", 'chat-a', bounties[0].id)
+        assert Bounty.from_json(rows[0][3]) == bounties[0]
+        
+        print("✅ Notification outbox test passed")
+    
+    async def test_email_notifier(self):
+        """Test emails go out over one SMTP session that is reopened when the server drops it"""
+        messages = []
+        connections = []
+        
+        # Minimal SMTP server; hangs up after the second message of a session
+        async def handle(reader, writer):
+            connections.append(writer)
+            writer.write(b"220 localhost fake SMTP\r\n")
+            received = 0
+            while line := await reader.readline():
+                command = line.decode().strip().upper()
+                if command.startswith(('EHLO', 'HELO')):
+                    writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+                elif command == 'DATA':
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    data = b""
+                    while (chunk := await reader.readline()) != b".\r\n":
+                        data += chunk
+                    messages.append(message_from_bytes(data))
+                    writer.write(b"250 OK\r\n")
+                    received += 1
+                    if received == 2:
+                        await writer.drain()
+                        break
+                elif command.startswith('RCPT') and 'REFUSED' in command:
+                    writer.write(b"550 No such user\r\n")
+                elif command == 'QUIT':
+                    writer.write(b"221 Bye\r\n")
+                    break
+                else:
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+            writer.close()
+        
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        email = EmailNotifier('127.0.0.1', port, sender='bot@example.com', starttls=False, timeout=5)
+        
+        bounties = [build_bounty(f'Bounty {i}', '$10', 'desc', 'alice', f'/b/{i}') for i in range(2)]
+        subject, body = self.scraper.format_email_digest(bounties)
+        assert subject == "2 new Replit bounties"
+        for _ in range(3):
+            assert await email.send('me@example.com', subject, body)
+        # A refused recipient fails right away, without reconnecting to retry
+        assert not await email.send('refused@example.com', subject, body)
+        assert email.failed == 1 and email.connections == 2
+        await email.close()
+        server.close()
+        await server.wait_closed()
+        
+        # Two messages on the first session, then one reconnect
+        assert len(messages) == 3 and email.connections == 2 and len(connections) == 2
+        assert messages[0]['To'] == 'me@example.com' and messages[0]['Subject'] == subject
+        assert 'Bounty 1' in messages[0].get_payload()
+        
+        # Email deliveries go to the email channel, not Telegram
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id, email=email, email_recipient='me@example.com')
+        assert scraper.route(bounties)['mailto:me@example.com'] == bounties
+        
+        print("✅ Email notifier test passed")
+    
+    def test_poll_scheduler(self):
+        """Test the poll interval follows arrival rates and backs off on errors and 429s"""
+        scheduler = PollScheduler(300, min_interval=60, max_interval=1800, jitter=0)
+        busy_hour = datetime(2030, 1, 1, 10, tzinfo=timezone.utc)
+        quiet_hour = busy_hour.replace(hour=3)
+        assert scheduler.next_interval(busy_hour) == 300
+        
+        # 10 bounties an hour at 10:00 UTC aims for one per poll, nothing at night waits the longest
+        scheduler.load_history({10: 140}, days=14)
+        assert round(scheduler.next_interval(busy_hour)) == 360
+        assert scheduler.next_interval(quiet_hour) == 1800
+        
+        # A burst (6 in 10 minutes = 36/hour) speeds polling up, but never below the minimum
+        scheduler.record(0, busy_hour)
+        scheduler.record(6, busy_hour + timedelta(minutes=10))
+        assert scheduler.recent_rate == 36
+        assert round(scheduler.next_interval(busy_hour)) == 157
+        scheduler.record(300, busy_hour + timedelta(minutes=20))
+        assert scheduler.next_interval(busy_hour) == 60
+        
+        # Errors back off exponentially, rate limits faster and at least for Retry-After
+        scheduler.record_error()
+        assert scheduler.next_interval() == 300
+        scheduler.record_error()
+        assert scheduler.next_interval() == 600
+        scheduler.record_error(rate_limited=True, retry_after=float(parse_retry_after('120')))
+        assert scheduler.next_interval() == 1800
+        scheduler.errors = 1
+        scheduler.retry_after = 900
+        assert scheduler.next_interval() == 900
+        
+        # Jitter stays within its fraction of the interval
+        jittered = PollScheduler(300, jitter=0.1, rng=random.Random(1))
+        intervals = [jittered.next_interval() for _ in range(100)]
+        assert all(270 <= interval <= 330 for interval in intervals) and len(set(intervals)) > 1
+        
+        # A 429 from the page counts as rate limiting, not as a quiet poll
+        scraper = BountyScraper(self.test_bot_token, self.test_chat_id)
+        scraper.sources[0].status = 429
+        scraper.sources[0].retry_after = 1200
+        scraper._record_poll(jittered)
+        assert jittered.rate_limited and jittered.retry_after == 1200
+        
+        print("✅ Poll scheduler test passed")
+    
+    def test_startup_imports(self):
+        """Test the entry points don't load Playwright, asyncpg or aiohttp until a command needs them"""
+        scraper_imports = import_times('scraper')
+        assert not {name.split('.')[0] for name in scraper_imports} & HEAVY_MODULES
+        # The CLI only imports a command's modules once that command runs
+        cli_imports = import_times('cli')
+        assert 'scraper' not in cli_imports and 'db' not in cli_imports
+        
+        # cli.py's commands fix the mode: scrape doesn't take --daemon or the daemon's options
+        assert parse_args(['--interval', '60'], prog="cli.py daemon", daemon=True).daemon
+        with patch('sys.stderr'):
+            for option in ('--daemon', '--interval=60', '--recycle-after=5', '--metrics-port=9100'):
+                try:
+                    parse_args([option], prog="cli.py scrape", daemon=False)
+                except SystemExit:
+                    pass
+                else:
+                    raise AssertionError(f"cli.py scrape accepted {option}")
+        
+        print(f"✅ Startup imports test passed (scraper {scraper_imports['scraper']:.0f} ms, "
+              f"cli {cli_imports['cli']:.0f} ms)")
+    
     async def test_scraping_simulation(self):
         """Simulate scraping without actual browser (for testing structure)"""
         # This would need actual browser testing in a real environment
         # For now, just test the data structure
-        mock_bounty = {
-            'title': 'Mock Bounty',
-            'price': '$50',
-            'description': 'Mock description',
-            'author': 'Mock Author',
-            'link': 'https://mock.com',
-            'scraped_at': '2024-01-01T00:00:00',
-            'id': 12345
-        }
+        mock_bounty = build_bounty('Mock Bounty', '$50', 'Mock description', 'Mock Author',
+                                   'https://mock.com/bounty/?ref=feed#top', cycles='5,000')
         
         # Test data extraction format
         required_fields = ['title', 'price', 'description', 'author', 'link', 'scraped_at', 'id']
         for field in required_fields:
-            assert field in mock_bounty
+            assert hasattr(mock_bounty, field)
+        # Parsed once, no per-instance __dict__
+        assert mock_bounty.price_cents == 5000 and mock_bounty.cycles == 5000
+        assert isinstance(mock_bounty.scraped_at, datetime)
+        assert mock_bounty.link == 'https://mock.com/bounty'
+        assert not hasattr(mock_bounty, '__dict__')
         
         print("✅ Scraping data structure test passed")
     
@@ -100,8 +957,28 @@ class TestScraper:
         print("🧪 Running tests...")
         
         self.test_find_new_bounties()
-        self.test_storage_operations()
-        self.test_telegram_notification()
+        self.test_bounty_fingerprint()
+        asyncio.run(self.test_storage_operations())
+        asyncio.run(self.test_telegram_notification())
+        asyncio.run(self.test_telegram_rate_limit_retry())
+        asyncio.run(self.test_digest_mode())
+        asyncio.run(self.test_wait_for_bounty_list())
+        self.test_bounties_from_payload()
+        asyncio.run(self.test_extract_bounties())
+        asyncio.run(self.test_crawl_stops_at_known_bounty())
+        self.test_fixture_server()
+        asyncio.run(self.test_replay_scrape())
+        asyncio.run(self.test_daemon())
+        asyncio.run(self.test_http_mode())
+        asyncio.run(self.test_metrics())
+        asyncio.run(self.test_lean_mode_routing())
+        asyncio.run(self.test_change_detection())
+        asyncio.run(self.test_multi_source())
+        self.test_subscriptions()
+        asyncio.run(self.test_notification_outbox())
+        asyncio.run(self.test_email_notifier())
+        self.test_poll_scheduler()
+        self.test_startup_imports()
         asyncio.run(self.test_scraping_simulation())
         
         print("✅ All tests passed!")
@@ -120,7 +997,7 @@ async def test_live_scraping():
     bounties = await scraper.scrape_bounties(limit=3)
     print(f"🔍 Scraped {len(bounties)} bounties:")
     for bounty in bounties:
-        print(f"  - {bounty['title']} ({bounty['price']})")
+        print(f"  - {bounty.title} ({bounty.price})")
 
 if __name__ == "__main__":
     # Run unit tests